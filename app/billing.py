@@ -0,0 +1,184 @@
+"""Personal billing days driven by a single timer heap.
+
+Members without a personal ``billing_day`` are reminded by the global
+``members_reminder`` cron job on ``BILLING_DAY``. Members with one are kept in
+a min-heap keyed by the moment their next reminder is due. The heap is built
+once at startup and then kept up to date from storage events, and one task
+sleeps until the earliest entry is due — nothing scans the member list on a
+timer.
+
+A reminder that fell due while the bot was down is sent right after the
+start, within the same ``MISSED_JOB_GRACE_HOURS`` as missed cron runs;
+members it already reached this month are remembered and skipped.
+
+Payments are still keyed by calendar month: the personal day only moves the
+reminder within the month, exactly like ``BILLING_DAY`` does for everyone else.
+"""
+
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from app import sender, storage
+from app.config import REMINDER_WINDOW_MINUTES, REMINDER_WINDOW_START
+from app.keyboards import REMINDER_KB
+from app.models import Member
+from app.scheduler import MISSED_JOB_GRACE, TZ, dispatch_offset
+from app.texts import build_reminder_text
+
+log = logging.getLogger(__name__)
+
+
+def _month_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m")
+
+
+def due_at(uid: int, day: int, year: int, month: int) -> datetime:
+    """Reminder moment for ``uid`` in the given month.
+
+    Same dispatch window and per-uid offset as the global reminder run, so
+    personal reminders are spread the same way.
+    """
+    hour, minute = REMINDER_WINDOW_START
+    start = datetime(year, month, day, hour, minute, tzinfo=TZ)
+    return start + timedelta(seconds=dispatch_offset(uid, REMINDER_WINDOW_MINUTES * 60))
+
+
+def next_due(uid: int, day: int, now: datetime) -> datetime:
+    """First reminder moment after ``now`` for a month the member hasn't paid."""
+    year, month = now.year, now.month
+    while True:
+        due = due_at(uid, day, year, month)
+        if due > now and not storage.is_paid(uid, _month_key(due)):
+            return due
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def missed_due(uid: int, day: int, now: datetime) -> datetime | None:
+    """This month's reminder moment if it passed without reaching the member."""
+    due = due_at(uid, day, now.year, now.month)
+    month = _month_key(due)
+    if (
+        due <= now
+        and now - due <= MISSED_JOB_GRACE
+        and not storage.is_paid(uid, month)
+        and uid not in storage.get_reminded(month)
+    ):
+        return due
+    return None
+
+
+class BillingQueue:
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int]] = []
+        # uid -> timestamp of its live heap entry. Heap entries that don't
+        # match are stale (rescheduled or removed) and skipped when popped.
+        self._due: dict[int, float] = {}
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._admin_id = 0
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def rebuild(self, members: dict[int, Member], now: datetime) -> None:
+        self._due = {}
+        for uid, member in members.items():
+            if not member.billing_day:
+                continue
+            # Due while the bot was down: send right away.
+            if missed_due(uid, member.billing_day, now) is not None:
+                self._due[uid] = now.timestamp()
+            else:
+                self._due[uid] = next_due(uid, member.billing_day, now).timestamp()
+        self._heap = [(ts, uid) for uid, ts in self._due.items()]
+        heapq.heapify(self._heap)
+        self._wake.set()
+
+    def schedule(self, uid: int, member: Member | None, now: datetime | None = None) -> None:
+        if member is None or not member.billing_day:
+            self.discard(uid)
+            return
+        ts = next_due(uid, member.billing_day, now or datetime.now(TZ)).timestamp()
+        if self._due.get(uid) == ts:
+            return
+        self._due[uid] = ts
+        heapq.heappush(self._heap, (ts, uid))
+        if self._heap[0] == (ts, uid):
+            self._wake.set()
+
+    def discard(self, uid: int) -> None:
+        self._due.pop(uid, None)
+
+    def on_storage_event(self, event: str, chat_id: int) -> None:
+        if event == storage.EVENT_STATE_REPLACED:
+            self.rebuild(storage.list_members(self._admin_id), datetime.now(TZ))
+        elif event == storage.EVENT_USER_REMOVED:
+            self.discard(chat_id)
+        else:
+            self.schedule(chat_id, storage.get_user(chat_id))
+
+    def _next_ts(self) -> float | None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now_ts: float) -> list[tuple[float, int]]:
+        due: list[tuple[float, int]] = []
+        while (ts := self._next_ts()) is not None and ts <= now_ts:
+            _, uid = heapq.heappop(self._heap)
+            del self._due[uid]
+            due.append((ts, uid))
+        return due
+
+    async def run(self, bot: Bot) -> None:
+        while True:
+            self._wake.clear()
+            next_ts = self._next_ts()
+            timeout = None
+            if next_ts is not None:
+                timeout = max(0.0, next_ts - datetime.now(TZ).timestamp())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except TimeoutError:
+                pass
+            for ts, uid in self.pop_due(datetime.now(TZ).timestamp()):
+                await self._remind(bot, uid, datetime.fromtimestamp(ts, TZ))
+
+    async def _remind(self, bot: Bot, uid: int, due: datetime) -> None:
+        member = storage.get_user(uid)
+        if member is None or not member.billing_day:
+            return
+        try:
+            if storage.is_paid(uid, _month_key(due)) or not member.reachable:
+                return
+            try:
+                await sender.send_message(
+                    bot, uid, build_reminder_text(), reply_markup=REMINDER_KB
+                )
+                outcome = storage.DELIVERY_OK
+            except TelegramForbiddenError:
+                outcome = storage.DELIVERY_BLOCKED
+            except TelegramBadRequest:
+                outcome = storage.DELIVERY_FAILED
+            except sender.DeliveryUnavailable:
+                log.warning("Bot API unavailable, personal reminder for %s skipped", uid)
+                return
+            await storage.record_delivery({uid: outcome})
+            await storage.mark_reminded(_month_key(due), [uid])
+        finally:
+            self.schedule(uid, storage.get_user(uid))
+
+    def start(self, bot: Bot, admin_id: int) -> None:
+        self._admin_id = admin_id
+        self.rebuild(storage.list_members(admin_id), datetime.now(TZ))
+        storage.subscribe(self.on_storage_event)
+        self._task = asyncio.create_task(self.run(bot))
+        log.info("Billing queue started with %d personal billing days", len(self))
+
+
+queue = BillingQueue()
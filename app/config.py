@@ -8,5 +8,69 @@ BOT_TOKEN = os.getenv("BOT_TOKEN")
 ADMIN_ID = int(os.getenv("ADMIN_ID"))
 BILLING_DAY = int(os.getenv("BILLING_DAY", 15))
 
+# Reminders on BILLING_DAY are spread over a window starting at
+# REMINDER_WINDOW_START (HH:MM, Moscow time) and sent in small batches.
+REMINDER_WINDOW_START = tuple(
+    int(part) for part in os.getenv("REMINDER_WINDOW_START", "12:00").split(":", 1)
+)
+REMINDER_WINDOW_MINUTES = int(os.getenv("REMINDER_WINDOW_MINUTES", 60))
+REMINDER_BATCH_SECONDS = int(os.getenv("REMINDER_BATCH_SECONDS", 30))
+
+# Scheduled runs (reminders, admin report) missed while the bot was down are
+# replayed on startup if they are at most this many hours old.
+MISSED_JOB_GRACE_HOURS = int(os.getenv("MISSED_JOB_GRACE_HOURS", 72))
+
+# Join requests from non-members: repeated /start within the cooldown is
+# ignored, the admin digest is refreshed at most this often, and requests
+# nobody answered expire after the TTL.
+JOIN_COOLDOWN_MINUTES = float(os.getenv("JOIN_COOLDOWN_MINUTES", 10))
+JOIN_DIGEST_SECONDS = float(os.getenv("JOIN_DIGEST_SECONDS", 15))
+JOIN_REQUEST_TTL_HOURS = float(os.getenv("JOIN_REQUEST_TTL_HOURS", 48))
+
+# Per-user flood limits: a burst of N updates, refilled at RATE per second.
+# Updates over the limit wait up to THROTTLE_MAX_DELAY seconds, then are dropped.
+THROTTLE_MESSAGE_RATE = float(os.getenv("THROTTLE_MESSAGE_RATE", 1))
+THROTTLE_MESSAGE_BURST = int(os.getenv("THROTTLE_MESSAGE_BURST", 5))
+THROTTLE_CALLBACK_RATE = float(os.getenv("THROTTLE_CALLBACK_RATE", 2))
+THROTTLE_CALLBACK_BURST = int(os.getenv("THROTTLE_CALLBACK_BURST", 10))
+THROTTLE_MAX_DELAY = float(os.getenv("THROTTLE_MAX_DELAY", 1))
+
+# Repeated taps on one-shot buttons ("Оплачено ✅", "✅ Да", "✅ Принять", ...)
+# are ignored for this many seconds after the first one was handled.
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", 10))
+
+# Payment notifications to the admin are buffered this many seconds and
+# merged into one message edited in place.
+PAID_NOTIFY_SECONDS = float(os.getenv("PAID_NOTIFY_SECONDS", 60))
+
 DEFAULT_PRICE = os.getenv("PRICE", "0")
 DEFAULT_PAYMENT_INFO = os.getenv("PAYMENT_INFO", "—")
+
+# Encoding of state.json: json (pretty), json-compact or msgpack.
+# See app/serialization.py; the format is auto-detected on load.
+STATE_FORMAT = os.getenv("STATE_FORMAT", "json")
+# How often to check whether another process sharing the data directory
+# has written state.json, in seconds.
+STATE_WATCH_SECONDS = float(os.getenv("STATE_WATCH_SECONDS", 5))
+
+# Instruction pages: directory with one HTML file per page (see
+# app/instructions.py; empty means app/content/instructions) and how often
+# to check it for edits, in seconds (0 disables hot reload).
+INSTRUCTIONS_DIR = os.getenv("INSTRUCTIONS_DIR", "")
+INSTRUCTIONS_WATCH_SECONDS = float(os.getenv("INSTRUCTIONS_WATCH_SECONDS", 10))
+
+# Health endpoint (/health, /ready) for Docker's HEALTHCHECK; port 0 disables
+# it. Event-loop lag over the warn threshold is logged; over the fail
+# threshold /health answers 503.
+HEALTH_HOST = os.getenv("HEALTH_HOST", "127.0.0.1")
+HEALTH_PORT = int(os.getenv("HEALTH_PORT", 8080))
+LOOP_LAG_WARN_SECONDS = float(os.getenv("LOOP_LAG_WARN_SECONDS", 0.5))
+LOOP_LAG_FAIL_SECONDS = float(os.getenv("LOOP_LAG_FAIL_SECONDS", 30))
+
+# HTTP client used by the Bot. BOT_API_URL points the bot at a self-hosted
+# Bot API server (e.g. http://telegram-bot-api:8081); empty means api.telegram.org.
+BOT_API_URL = os.getenv("BOT_API_URL", "")
+BOT_API_LOCAL_MODE = os.getenv("BOT_API_LOCAL_MODE", "0") == "1"
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", 75))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))
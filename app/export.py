@@ -0,0 +1,78 @@
+"""CSV export of members and payment history.
+
+Rows are produced by generators straight from state and written into a
+spooled temporary file (in memory while small, on disk once it grows), which
+is then uploaded chunk by chunk — the table never exists as Python lists.
+"""
+
+import csv
+import io
+import tempfile
+from collections.abc import AsyncGenerator, Iterator
+from typing import BinaryIO
+
+from aiogram import Bot
+from aiogram.types import InputFile
+
+from app.storage import list_members, list_payments
+
+# Keep exports up to this size in memory, spill to disk beyond it.
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+class SpooledInputFile(InputFile):
+    """Upload an already written binary file object in chunks."""
+
+    def __init__(self, file: BinaryIO, filename: str) -> None:
+        super().__init__(filename=filename)
+        self.file = file
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+
+def _member_rows(admin_id: int) -> Iterator[list]:
+    yield ["id", "name", "username", "billing_day", "reachable"]
+    for uid, member in list_members(admin_id).items():
+        yield [
+            uid,
+            member.name,
+            member.username or "",
+            member.billing_day or "",
+            "yes" if member.reachable else "no",
+        ]
+
+
+def _payment_rows(admin_id: int, since: str | None, until: str | None) -> Iterator[list]:
+    payments = list_payments()
+    months = sorted(
+        month
+        for month in payments
+        if (since is None or month >= since) and (until is None or month <= until)
+    )
+    yield ["id", "name", *months]
+    for uid, member in list_members(admin_id).items():
+        yield [uid, member.name, *("1" if uid in payments[month] else "" for month in months)]
+
+
+def _spool(rows: Iterator[list]) -> BinaryIO:
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    # utf-8-sig so Excel opens Cyrillic names correctly.
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    csv.writer(text).writerows(rows)
+    text.flush()
+    text.detach()
+    return file
+
+
+def export_members(admin_id: int) -> SpooledInputFile:
+    return SpooledInputFile(_spool(_member_rows(admin_id)), "members.csv")
+
+
+def export_payments(
+    admin_id: int, since: str | None = None, until: str | None = None
+) -> SpooledInputFile:
+    """Member × month matrix, optionally limited to ``since``..``until`` (YYYY-MM)."""
+    return SpooledInputFile(_spool(_payment_rows(admin_id, since, until)), "payments.csv")
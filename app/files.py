@@ -0,0 +1,117 @@
+"""Documents the bot hands out (VPN configs), stored once and sent by file_id.
+
+A document is kept in ``app/data/files/<sha256>`` and addressed by the hash
+of its content. Storage maps the hash and the file name to the Telegram
+``file_id`` of the document — a ``file_id`` carries the name it was uploaded
+under, so the same bytes sent under a new name get their own upload. Once
+known, every send — to one member or to hundreds — passes just that id, so
+the bytes go over the wire at most once per name. Documents the admin uploads
+to the bot are registered under their own ``file_id`` right away.
+
+If Telegram stops accepting a cached ``file_id``, it is dropped and the file
+is uploaded again from disk on the next send.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, Document, Message
+
+from app import metrics, sender, storage
+
+log = logging.getLogger(__name__)
+
+FILES_DIR = storage.DATA_PATH.parent / "files"
+
+# Bot API refuses to download larger files.
+MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+
+# One upload per document even when several sends race for it.
+_uploads: dict[str, asyncio.Lock] = {}
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _cache_key(key: str, filename: str) -> str:
+    return f"{key}/{filename}"
+
+
+def store(data: bytes) -> str:
+    """Keep ``data`` on disk (if not there yet) and return its hash."""
+    key = digest(data)
+    path = FILES_DIR / key
+    if not path.exists():
+        FILES_DIR.mkdir(exist_ok=True, parents=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+    return key
+
+
+async def receive(bot: Bot, document: Document) -> str:
+    """Store a document sent to the bot and reuse its ``file_id``.
+
+    Raises ValueError if the file is too big to download.
+    """
+    if document.file_size and document.file_size > MAX_DOWNLOAD_BYTES:
+        raise ValueError("file is too big")
+    buffer = io.BytesIO()
+    await bot.download(document, destination=buffer)
+    key = store(buffer.getvalue())
+    cache_key = _cache_key(key, document.file_name or "config")
+    if storage.get_file_id(cache_key) is None:
+        await storage.remember_file(cache_key, document.file_id)
+    return key
+
+
+async def send_document(
+    bot: Bot,
+    chat_id: int,
+    key: str,
+    filename: str,
+    *,
+    interactive: bool = False,
+    **kwargs,
+) -> Message:
+    """Send the stored document ``key`` as ``filename``, uploading it only if needed."""
+    cache_key = _cache_key(key, filename)
+    file_id = storage.get_file_id(cache_key)
+    if file_id is not None:
+        try:
+            message = await sender.send_document(
+                bot, chat_id, file_id, interactive=interactive, **kwargs
+            )
+            metrics.incr("files.sent_by_id")
+            return message
+        except TelegramBadRequest as exc:
+            if "file" not in exc.message.lower():
+                raise
+            log.warning("Cached file_id of %s rejected (%s), uploading again", key, exc.message)
+            await storage.forget_file(cache_key)
+
+    lock = _uploads.setdefault(cache_key, asyncio.Lock())
+    async with lock:
+        file_id = storage.get_file_id(cache_key)
+        if file_id is not None:
+            # Uploaded by a concurrent send while we waited.
+            metrics.incr("files.sent_by_id")
+            return await sender.send_document(
+                bot, chat_id, file_id, interactive=interactive, **kwargs
+            )
+        data = (FILES_DIR / key).read_bytes()
+        message = await sender.send_document(
+            bot,
+            chat_id,
+            BufferedInputFile(data, filename),
+            interactive=interactive,
+            **kwargs,
+        )
+        metrics.incr("files.uploaded")
+        await storage.remember_file(cache_key, message.document.file_id)
+        return message
@@ -1,19 +1,55 @@
 from aiogram import Router
 
+from app.config import (
+    ADMIN_ID,
+    IDEMPOTENCY_TTL_SECONDS,
+    THROTTLE_CALLBACK_BURST,
+    THROTTLE_CALLBACK_RATE,
+    THROTTLE_MAX_DELAY,
+    THROTTLE_MESSAGE_BURST,
+    THROTTLE_MESSAGE_RATE,
+)
 from app.handlers import (
     admin,
     admin_add,
     admin_broadcast,
+    admin_configs,
     admin_dm,
+    admin_paid,
     admin_price,
+    admin_search,
+    admin_snapshots,
     common,
     info,
     member,
 )
+from app.middlewares import IdempotencyMiddleware, ThrottlingMiddleware
 
 
 def build_router() -> Router:
     router = Router()
+    # Inner middlewares: only updates that matched a handler spend tokens.
+    exempt = frozenset({ADMIN_ID})
+    router.message.middleware(
+        ThrottlingMiddleware(
+            "message",
+            rate=THROTTLE_MESSAGE_RATE,
+            burst=THROTTLE_MESSAGE_BURST,
+            max_delay=THROTTLE_MAX_DELAY,
+            exempt=exempt,
+        )
+    )
+    # Double taps are dropped before they spend a token.
+    router.callback_query.middleware(IdempotencyMiddleware(IDEMPOTENCY_TTL_SECONDS))
+    router.callback_query.middleware(
+        ThrottlingMiddleware(
+            "callback",
+            rate=THROTTLE_CALLBACK_RATE,
+            burst=THROTTLE_CALLBACK_BURST,
+            max_delay=THROTTLE_MAX_DELAY,
+            exempt=exempt,
+        )
+    )
     # FSM handlers must be registered before the generic member/admin text handlers,
     # otherwise the text the admin types inside a state will be matched by another
     # handler first.
@@ -21,8 +57,12 @@ def build_router() -> Router:
     router.include_router(admin_price.router)
     router.include_router(admin_broadcast.router)
     router.include_router(admin_dm.router)
+    router.include_router(admin_configs.router)
+    router.include_router(admin_paid.router)
+    router.include_router(admin_search.router)
     router.include_router(common.router)
     router.include_router(info.router)
     router.include_router(member.router)
     router.include_router(admin.router)
+    router.include_router(admin_snapshots.router)
     return router
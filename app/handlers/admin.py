@@ -1,7 +1,10 @@
+import re
+from collections.abc import Callable
 from datetime import datetime
 
 from aiogram import F, Router
-from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.filters import Command, CommandObject
 from aiogram.types import (
     CallbackQuery,
     InlineKeyboardButton,
@@ -10,36 +13,100 @@ from aiogram.types import (
     ReplyKeyboardRemove,
 )
 
+from app import metrics, sender, stats
 from app.config import ADMIN_ID
+from app.export import export_members, export_payments
 from app.handlers.common import ADMIN_HELP_TEXT
-from app.keyboards import ADMIN_KB, REMINDER_KB
+from app.keyboards import ADMIN_KB, REMINDER_KB, member_picker_kb
+from app.models import Member
 from app.scheduler import admin_summary, remind_members
-from app.storage import list_members, remove_user, set_paid, unpaid
+from app.storage import (
+    DELIVERY_BLOCKED,
+    DELIVERY_FAILED,
+    DELIVERY_OK,
+    get_stats,
+    list_members,
+    list_users,
+    record_delivery,
+    remove_user,
+    set_billing_day,
+)
 from app.texts import build_reminder_text
 
 router = Router()
 
+_MONTH_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
 
 def _is_admin(msg: Message) -> bool:
     return msg.from_user.id == ADMIN_ID
 
 
+def _delivery_mark(member: Member) -> str:
+    if member.blocked:
+        return "🚫 "
+    if not member.reachable:
+        return "⚠️ "
+    return ""
+
+
+async def _send_reminder(
+    call: CallbackQuery, target_id: int, ok_text: str, release_tap: Callable[[], None]
+) -> None:
+    try:
+        await sender.send_message(
+            call.bot,
+            target_id,
+            build_reminder_text(),
+            reply_markup=REMINDER_KB,
+            interactive=True,
+        )
+    except sender.DeliveryUnavailable:
+        # Let the admin tap the button again once Telegram is back.
+        release_tap()
+        await call.answer("⏳ Telegram сейчас недоступен, попробуйте позже.", show_alert=True)
+    except TelegramForbiddenError:
+        await record_delivery({target_id: DELIVERY_BLOCKED})
+        await call.answer("❌ Не удалось отправить: пользователь заблокировал бота.", show_alert=True)
+    except TelegramBadRequest:
+        await record_delivery({target_id: DELIVERY_FAILED})
+        await call.answer(
+            "❌ Не удалось отправить: пользователь не открывал чат с ботом.", show_alert=True
+        )
+    else:
+        await record_delivery({target_id: DELIVERY_OK})
+        await call.answer(ok_text)
+
+
+async def _remind_all(msg: Message) -> None:
+    if await remind_members(msg.bot, ADMIN_ID):
+        await msg.answer("✅ Напоминание всем отправлено.")
+    else:
+        await msg.answer(
+            "⚠️ Напоминание разослано не всем: Telegram API недоступен. "
+            "Попробуйте позже."
+        )
+
+
 @router.message(F.text == "📢 Напомнить всем", F.from_user.id == ADMIN_ID)
 async def admin_remind_all(msg: Message):
-    await remind_members(msg.bot, ADMIN_ID)
-    await msg.answer("✅ Напоминание всем отправлено.")
+    await _remind_all(msg)
 
 
 @router.message(F.text == "👥 Напомнить участнику", F.from_user.id == ADMIN_ID)
 async def admin_pick_member(msg: Message):
     members = list_members(ADMIN_ID)
     rows = [
-        [InlineKeyboardButton(text=info["name"], callback_data=f"forceping:{uid}")]
-        for uid, info in members.items()
-    ] or [[InlineKeyboardButton(text="(пусто)", callback_data="noop")]]
+        [
+            InlineKeyboardButton(
+                text=f"{_delivery_mark(member)}{member.name}", callback_data=f"forceping:{uid}"
+            )
+        ]
+        for uid, member in members.items()
+    ]
     await msg.answer(
         "Выберите участника для напоминания:",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=rows),
+        reply_markup=member_picker_kb(rows, "forceping"),
     )
 
 
@@ -52,21 +119,32 @@ async def admin_list_members(msg: Message):
 
     no_username_lines: list[str] = []
     kb_rows: list[list[InlineKeyboardButton]] = []
+    flagged = False
 
-    for uid, info in members.items():
-        name = info["name"]
-        username = info.get("username")
+    for uid, member in members.items():
+        mark = _delivery_mark(member)
+        flagged = flagged or bool(mark)
+        name = member.name
+        username = member.username
         if username:
-            kb_rows.append([InlineKeyboardButton(text=name, url=f"https://t.me/{username}")])
+            kb_rows.append(
+                [InlineKeyboardButton(text=f"{mark}{name}", url=f"https://t.me/{username}")]
+            )
         else:
             no_username_lines.append(
-                f"• <b>{name}</b> (ID <code>{uid}</code>) — <i>нет @username, попроси нажать /start</i>"
+                f"• {mark}<b>{name}</b> (ID <code>{uid}</code>) — <i>нет @username, попроси нажать /start</i>"
             )
 
     text_parts = ["<b>Все участники:</b>"]
     if no_username_lines:
         text_parts.append("")
         text_parts.extend(no_username_lines)
+    if flagged:
+        text_parts.append("")
+        text_parts.append(
+            "🚫 — заблокировал бота, ⚠️ — сообщения не доходят. "
+            "Рассылки и напоминания их пропускают, пока участник не нажмёт /start."
+        )
     if kb_rows:
         text_parts.append("")
         text_parts.append("↓ Открыть чат:")
@@ -80,17 +158,17 @@ async def admin_list_members(msg: Message):
 async def admin_delete_member_pick(msg: Message):
     members = list_members(ADMIN_ID)
     rows = [
-        [InlineKeyboardButton(text=f"❌ {info['name']}", callback_data=f"delask:{uid}")]
-        for uid, info in members.items()
-    ] or [[InlineKeyboardButton(text="(пусто)", callback_data="noop")]]
-    await msg.answer("Кого удалить?", reply_markup=InlineKeyboardMarkup(inline_keyboard=rows))
+        [InlineKeyboardButton(text=f"❌ {member.name}", callback_data=f"delask:{uid}")]
+        for uid, member in members.items()
+    ]
+    await msg.answer("Кого удалить?", reply_markup=member_picker_kb(rows, "delask"))
 
 
 @router.callback_query(F.data.startswith("delask:"))
 async def cb_del_confirm(call: CallbackQuery):
-    uid = call.data.split(":")[1]
-    info = list_members(ADMIN_ID).get(uid)
-    if not info:
+    uid = int(call.data.split(":")[1])
+    member = list_members(ADMIN_ID).get(uid)
+    if member is None:
         await call.answer("Участник уже удалён.", show_alert=True)
         return
     kb = InlineKeyboardMarkup(
@@ -102,24 +180,26 @@ async def cb_del_confirm(call: CallbackQuery):
         ]
     )
     await call.message.edit_text(
-        f"Удалить <b>{info['name']}</b> из списка участников?", reply_markup=kb
+        f"Удалить <b>{member.name}</b> из списка участников?", reply_markup=kb
     )
     await call.answer()
 
 
-@router.callback_query(F.data.startswith("delyes:"))
+@router.callback_query(F.data.startswith("delyes:"), flags={"idempotent": True})
 async def cb_del_yes(call: CallbackQuery):
     uid = int(call.data.split(":")[1])
-    remove_user(uid)
+    await remove_user(uid)
     await call.message.edit_text("🗑 Участник удалён.")
     try:
-        await call.bot.send_message(
+        await sender.send_message(
+            call.bot,
             uid,
             "⛔️ Ваш доступ к VPN отключён администратором.\n"
             "Нажмите /start, чтобы запросить подключение снова.",
             reply_markup=ReplyKeyboardRemove(),
+            interactive=True,
         )
-    except TelegramBadRequest:
+    except (TelegramBadRequest, TelegramForbiddenError, sender.DeliveryUnavailable):
         pass
     await call.answer()
 
@@ -130,57 +210,44 @@ async def cb_del_no(call: CallbackQuery):
     await call.answer()
 
 
-@router.message(F.text == "✅ Отметить оплату", F.from_user.id == ADMIN_ID)
-async def admin_mark_paid_pick(msg: Message):
-    month = datetime.now().strftime("%Y-%m")
-    debtors = unpaid(month, ADMIN_ID)
-
-    if not debtors:
-        await msg.answer("🎉 Все участники уже отмечены как оплатившие.")
+@router.message(Command("billing_day"), F.from_user.id == ADMIN_ID)
+async def cmd_billing_day(msg: Message, command: CommandObject):
+    parts = (command.args or "").split()
+    if len(parts) != 2 or not parts[0].isdigit():
+        await msg.answer(
+            "Формат: <code>/billing_day ID ДЕНЬ</code> (1–28) "
+            "или <code>/billing_day ID -</code>, чтобы вернуть общий день."
+        )
         return
 
-    members = list_members(ADMIN_ID)
-    rows = [
-        [InlineKeyboardButton(text=members[str(uid)]["name"], callback_data=f"markpaid:{uid}")]
-        for uid in debtors
-    ]
-    await msg.answer(
-        f"Кто уже оплатил за {month}?", reply_markup=InlineKeyboardMarkup(inline_keyboard=rows)
-    )
-
-
-@router.callback_query(F.data.startswith("markpaid:"))
-async def cb_mark_paid(call: CallbackQuery):
-    uid = int(call.data.split(":")[1])
-    month = datetime.now().strftime("%Y-%m")
-    set_paid(uid, month)
+    uid = int(parts[0])
+    if parts[1] == "-":
+        day = None
+    elif parts[1].isdigit() and 1 <= int(parts[1]) <= 28:
+        day = int(parts[1])
+    else:
+        await msg.answer("⚠️ День должен быть числом от 1 до 28.")
+        return
 
-    await call.message.edit_text("✅ Оплата отмечена.")
-    await call.answer("Отметил как оплачено.")
+    if uid not in list_members(ADMIN_ID) or not await set_billing_day(uid, day):
+        await msg.answer("Участник не найден.")
+        return
+    if day is None:
+        await msg.answer("✅ Участнику возвращён общий день оплаты.")
+    else:
+        await msg.answer(f"✅ Напоминания участнику будут приходить {day}-го числа.")
 
 
-@router.callback_query(F.data.startswith("forceping:"))
-async def cb_force_ping(call: CallbackQuery):
+@router.callback_query(F.data.startswith("forceping:"), flags={"idempotent": True})
+async def cb_force_ping(call: CallbackQuery, release_tap: Callable[[], None]):
     target_id = int(call.data.split(":")[1])
-    try:
-        await call.bot.send_message(target_id, build_reminder_text(), reply_markup=REMINDER_KB)
-        await call.answer("Принудительное напоминание отправлено!")
-    except TelegramBadRequest:
-        await call.answer(
-            "❌ Не удалось отправить: пользователь не открывал чат с ботом.", show_alert=True
-        )
+    await _send_reminder(call, target_id, "Принудительное напоминание отправлено!", release_tap)
 
 
-@router.callback_query(F.data.startswith("ping:"))
-async def cb_ping(call: CallbackQuery):
+@router.callback_query(F.data.startswith("ping:"), flags={"idempotent": True})
+async def cb_ping(call: CallbackQuery, release_tap: Callable[[], None]):
     target_id = int(call.data.split(":")[1])
-    try:
-        await call.bot.send_message(target_id, build_reminder_text(), reply_markup=REMINDER_KB)
-        await call.answer("Напоминание отправлено!")
-    except TelegramBadRequest:
-        await call.answer(
-            "❌ Не удалось отправить: пользователь не открывал чат с ботом.", show_alert=True
-        )
+    await _send_reminder(call, target_id, "Напоминание отправлено!", release_tap)
 
 
 @router.message(F.text == "📊 Статистика", F.from_user.id == ADMIN_ID)
@@ -198,7 +265,45 @@ async def cmd_summary(msg: Message):
     await admin_summary(msg.bot, ADMIN_ID)
 
 
+@router.message(Command("export"), F.from_user.id == ADMIN_ID)
+async def cmd_export(msg: Message, command: CommandObject):
+    months = (command.args or "").split()
+    if len(months) > 2 or not all(_MONTH_RE.match(month) for month in months):
+        await msg.answer(
+            "Формат: <code>/export</code>, <code>/export 2025-01</code> "
+            "или <code>/export 2025-01 2025-06</code>."
+        )
+        return
+    since = months[0] if months else None
+    until = months[1] if len(months) > 1 else None
+
+    period = " — ".join(months) if months else "вся история"
+    exports = [
+        (export_members(ADMIN_ID), "👥 Участники"),
+        (export_payments(ADMIN_ID, since, until), f"💳 Оплаты ({period})"),
+    ]
+    try:
+        for document, caption in exports:
+            await sender.send_document(
+                msg.bot, msg.chat.id, document, caption=caption, interactive=True
+            )
+    except sender.DeliveryUnavailable:
+        await msg.answer("⏳ Telegram сейчас недоступен, попробуйте /export позже.")
+    finally:
+        for document, _ in exports:
+            document.file.close()
+
+
+@router.message(Command("stats"), F.from_user.id == ADMIN_ID)
+async def cmd_stats(msg: Message):
+    await msg.answer(stats.render(get_stats(), list_users(), datetime.now()))
+
+
+@router.message(Command("metrics"), F.from_user.id == ADMIN_ID)
+async def cmd_metrics(msg: Message):
+    await msg.answer(metrics.render())
+
+
 @router.message(F.text == "/remind_now", F.from_user.id == ADMIN_ID)
 async def cmd_remind_now(msg: Message):
-    await remind_members(msg.bot, ADMIN_ID)
-    await msg.answer("✅ Напоминание всем отправлено.")
+    await _remind_all(msg)
@@ -1,12 +1,19 @@
-from aiogram import F, Router
-from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+import asyncio
+import csv
+import io
+import json
+from collections.abc import Iterator
+from typing import Any, BinaryIO
+
+from aiogram import Bot, F, Router
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramForbiddenError
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
 
 from app.config import ADMIN_ID
 from app.keyboards import ADMIN_BUTTON_TEXTS, ADMIN_KB, CANCEL_KB
-from app.storage import add_user, list_members
+from app.storage import add_user, add_users_many, list_members, list_users
 
 router = Router()
 
@@ -17,6 +24,112 @@ class AddMember(StatesGroup):
 
 CANCEL_TEXT = "❌ Отмена"
 
+# Bot API refuses to hand out files bigger than this to bots.
+MAX_IMPORT_SIZE = 20 * 1024 * 1024
+# Profile lookups during an import: at most this many in flight and this many
+# started per second, well under Telegram's limits.
+RESOLVE_CONCURRENCY = 8
+RESOLVE_PER_SECOND = 20
+
+ImportRow = tuple[int, str | None, str | None]
+
+
+def _iter_csv(stream: BinaryIO) -> Iterator[ImportRow | None]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    first_line = text.readline()
+    text.seek(0)
+    # Excel in a Russian locale writes ";" — pick whichever separator the
+    # first line actually uses.
+    delimiter = max(",;\t", key=first_line.count)
+    for line_no, row in enumerate(csv.reader(text, delimiter=delimiter)):
+        cells = [cell.strip() for cell in row]
+        if not cells or not any(cells):
+            continue
+        if not cells[0].isdigit():
+            if line_no:  # the first line may be a header
+                yield None
+            continue
+        name = cells[1] if len(cells) > 1 and cells[1] else None
+        username = cells[2].lstrip("@") if len(cells) > 2 and cells[2] else None
+        yield int(cells[0]), name, username
+
+
+def _json_row(item: Any) -> ImportRow | None:
+    if not isinstance(item, dict):
+        item = {"id": item}
+    uid, name, username = item.get("id"), item.get("name"), item.get("username")
+    if isinstance(uid, str) and uid.strip().isdigit():
+        uid = int(uid)
+    if isinstance(uid, bool) or not isinstance(uid, int) or uid < 0:
+        return None
+    if not isinstance(name, (str, type(None))) or not isinstance(username, (str, type(None))):
+        return None
+    return uid, name, username.lstrip("@") if username else None
+
+
+def _iter_json(stream: BinaryIO) -> Iterator[ImportRow | None]:
+    # The upload is already in memory, so parse it in one go.
+    payload = json.loads(stream.read())
+    if isinstance(payload, dict):
+        # Either a state.json dump or a bare {id: {...}} mapping.
+        payload = payload.get("users", payload)
+        if not isinstance(payload, dict):
+            raise ValueError("unsupported JSON layout")
+        for uid, info in payload.items():
+            yield _json_row({**(info if isinstance(info, dict) else {}), "id": uid})
+    elif isinstance(payload, list):
+        for item in payload:
+            yield _json_row(item)
+    else:
+        raise ValueError("unsupported JSON layout")
+
+
+def parse_members_file(stream: BinaryIO, filename: str) -> Iterator[ImportRow | None]:
+    """Yield ``(id, name, username)`` per entry of a CSV or JSON upload.
+
+    CSV rows are ``id[,name[,username]]`` (comma, semicolon or tab separated,
+    header optional) and are read row by row. JSON may be a list of ids, a
+    list of objects with ``id``/``name``/``username``, or a ``state.json``
+    dump. Unparseable entries — no numeric id, or a name/username that is
+    not a string — yield ``None`` so they can be counted.
+    """
+    head = stream.read(1)
+    stream.seek(0)
+    if filename.lower().endswith(".json") or head in (b"{", b"["):
+        return _iter_json(stream)
+    return _iter_csv(stream)
+
+
+async def _resolve_profiles(bot: Bot, rows: list[ImportRow]) -> list[tuple[ImportRow, bool]]:
+    """Look up real names/usernames for ``rows`` concurrently, rate limited."""
+    loop = asyncio.get_running_loop()
+    interval = 1 / RESOLVE_PER_SECOND
+    next_start = loop.time()
+    results: dict[int, tuple[ImportRow, bool]] = {}
+    pending = iter(enumerate(rows))
+
+    async def resolve(row: ImportRow) -> tuple[ImportRow, bool]:
+        nonlocal next_start
+        uid, name, username = row
+        now = loop.time()
+        delay = max(0.0, next_start - now)
+        next_start = max(now, next_start) + interval
+        await asyncio.sleep(delay)
+        try:
+            chat = await bot.get_chat(uid)
+        except TelegramAPIError:
+            return (uid, name or f"User {uid}", username), False
+        return (uid, chat.full_name or name or f"User {uid}", chat.username or username), True
+
+    async def worker() -> None:
+        # A fixed pool of workers pulls rows, so a big file never turns into
+        # one task per row.
+        for index, row in pending:
+            results[index] = await resolve(row)
+
+    await asyncio.gather(*(worker() for _ in range(min(RESOLVE_CONCURRENCY, len(rows)))))
+    return [results[index] for index in range(len(rows))]
+
 
 @router.message(F.text == "➕ Добавить участника", F.from_user.id == ADMIN_ID)
 async def start_add(msg: Message, state: FSMContext):
@@ -24,6 +137,8 @@ async def start_add(msg: Message, state: FSMContext):
     await msg.answer(
         "✏️ Отправьте ID и имя участника через пробел.\n"
         "Пример: <code>123456789 Иван</code>\n\n"
+        "Или пришлите файл CSV (<code>id,имя,username</code>) / JSON, чтобы добавить "
+        "сразу многих.\n\n"
         "Чтобы выйти из режима добавления — нажмите «Отмена».",
         reply_markup=CANCEL_KB,
     )
@@ -57,7 +172,7 @@ async def process_add(msg: Message, state: FSMContext):
     uid = int(parts[0])
     name = parts[1].strip() if len(parts) > 1 else f"User {uid}"
 
-    if str(uid) in list_members(ADMIN_ID):
+    if uid in list_members(ADMIN_ID):
         await msg.answer("Этот пользователь уже есть в списке.", reply_markup=ADMIN_KB)
         await state.clear()
         return
@@ -67,7 +182,7 @@ async def process_add(msg: Message, state: FSMContext):
         chat = await msg.bot.get_chat(uid)
         real_name = chat.full_name or name
         real_username = chat.username
-        add_user(uid, real_name, real_username, "member")
+        await add_user(uid, real_name, real_username, "member")
         display_name = real_name
         if not real_username:
             note = (
@@ -76,7 +191,7 @@ async def process_add(msg: Message, state: FSMContext):
                 "и он станет кликабельным в списке."
             )
     except (TelegramBadRequest, TelegramForbiddenError):
-        add_user(uid, name, None, "member")
+        await add_user(uid, name, None, "member")
         display_name = name
         note = (
             "\n\n⚠️ Не удалось подтянуть профиль автоматически. "
@@ -89,3 +204,52 @@ async def process_add(msg: Message, state: FSMContext):
         reply_markup=ADMIN_KB,
     )
     await state.clear()
+
+
+@router.message(AddMember.waiting, F.document)
+async def process_import(msg: Message, state: FSMContext):
+    document = msg.document
+    if document.file_size and document.file_size > MAX_IMPORT_SIZE:
+        await msg.answer("⚠️ Файл больше 20 МБ — Telegram не даст боту его скачать.")
+        return
+
+    buffer = await msg.bot.download(document)
+    existing = set(list_users())
+    rows: list[ImportRow] = []
+    skipped = invalid = 0
+    try:
+        for row in parse_members_file(buffer, document.file_name or ""):
+            if row is None:
+                invalid += 1
+            elif row[0] in existing:
+                skipped += 1
+            else:
+                existing.add(row[0])
+                rows.append(row)
+    except (ValueError, UnicodeDecodeError, csv.Error):
+        await msg.answer(
+            "⚠️ Не удалось разобрать файл. Нужен CSV (<code>id,имя,username</code>) "
+            "в UTF-8 или JSON. Попробуйте ещё раз или нажмите «Отмена»."
+        )
+        return
+
+    if rows:
+        await msg.answer(f"⏳ Подтягиваю профили: {len(rows)} чел.…")
+    resolved = await _resolve_profiles(msg.bot, rows)
+    added = await add_users_many([row for row, _ in resolved])
+    unresolved = sum(1 for _, ok in resolved if not ok)
+
+    report = [
+        "📥 <b>Импорт завершён</b>",
+        f"• Добавлено: <b>{added}</b>",
+        f"• Пропущено (уже в списке или повтор в файле): <b>{skipped}</b>",
+    ]
+    if invalid:
+        report.append(f"• Строк без числового ID: <b>{invalid}</b>")
+    if unresolved:
+        report.append(
+            f"• Профиль не подтянулся: <b>{unresolved}</b> — "
+            "пусть эти участники нажмут /start в боте."
+        )
+    await msg.answer("\n".join(report), reply_markup=ADMIN_KB)
+    await state.clear()
@@ -12,9 +12,16 @@ from aiogram.types import (
     Message,
 )
 
+from app import sender
 from app.config import ADMIN_ID
 from app.keyboards import ADMIN_BUTTON_TEXTS, ADMIN_KB, CANCEL_KB
-from app.storage import list_members
+from app.storage import (
+    DELIVERY_BLOCKED,
+    DELIVERY_FAILED,
+    DELIVERY_OK,
+    list_members,
+    record_delivery,
+)
 
 router = Router()
 
@@ -72,9 +79,11 @@ async def receive_broadcast_text(msg: Message, state: FSMContext):
         return
 
     try:
-        await msg.bot.send_message(
+        await sender.send_message(
+            msg.bot,
             ADMIN_ID,
             "👇 <b>Превью объявления:</b>\n\n" + text,
+            interactive=True,
         )
     except TelegramBadRequest as exc:
         await msg.answer(
@@ -100,7 +109,11 @@ async def cb_broadcast_cancel(call: CallbackQuery, state: FSMContext):
     await call.answer()
 
 
-@router.callback_query(Broadcast.waiting_confirm, F.data == "broadcast:send")
+@router.callback_query(
+    Broadcast.waiting_confirm,
+    F.data == "broadcast:send",
+    flags={"idempotent": True},
+)
 async def cb_broadcast_send(call: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     text: str | None = data.get("text")
@@ -112,24 +125,43 @@ async def cb_broadcast_send(call: CallbackQuery, state: FSMContext):
     members = list_members(ADMIN_ID)
     sent = 0
     failed: list[str] = []
-
-    for uid, info in members.items():
+    skipped: list[str] = []
+    outcomes: dict[int, str] = {}
+    interrupted = False
+
+    for uid, member in members.items():
+        if not member.reachable:
+            skipped.append(member.name)
+            continue
         try:
-            await call.bot.send_message(int(uid), text)
+            await sender.send_message(call.bot, uid, text)
             sent += 1
+            outcomes[uid] = DELIVERY_OK
         except TelegramForbiddenError:
-            failed.append(f"{info['name']} (заблокировал бота)")
+            failed.append(f"{member.name} (заблокировал бота)")
+            outcomes[uid] = DELIVERY_BLOCKED
         except TelegramBadRequest as exc:
-            failed.append(f"{info['name']} ({exc.message})")
+            failed.append(f"{member.name} ({exc.message})")
+            outcomes[uid] = DELIVERY_FAILED
+        except sender.DeliveryUnavailable:
+            interrupted = True
+            break
         await asyncio.sleep(0.05)  # лёгкий троттлинг, чтобы не упереться в лимиты
 
+    await record_delivery(outcomes)
     await state.clear()
     await call.message.edit_text("✅ Рассылка завершена.")
 
     report = [f"📨 Отправлено: <b>{sent}</b> из <b>{len(members)}</b>."]
+    if interrupted:
+        report.append("⚠️ Рассылка прервана: Telegram API недоступен. Остальным не отправлено.")
     if failed:
         report.append("")
         report.append("Не доставлено:")
         report.extend(f"• {item}" for item in failed)
+    if skipped:
+        report.append("")
+        report.append("Пропущено (бот недоступен, см. «📋 Участники»):")
+        report.extend(f"• {name}" for name in skipped)
     await call.message.answer("\n".join(report), reply_markup=ADMIN_KB)
     await call.answer()
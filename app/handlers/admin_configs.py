@@ -0,0 +1,215 @@
+import asyncio
+import html
+
+from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.filters import StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
+
+from app import files, sender
+from app.config import ADMIN_ID
+from app.keyboards import ADMIN_BUTTON_TEXTS, ADMIN_KB, CANCEL_KB
+from app.search import match_members
+from app.storage import (
+    DELIVERY_BLOCKED,
+    DELIVERY_FAILED,
+    DELIVERY_OK,
+    list_members,
+    record_delivery,
+)
+
+router = Router()
+
+
+class ConfigDistribution(StatesGroup):
+    waiting_file = State()
+    waiting_recipients = State()
+    waiting_confirm = State()
+
+
+CANCEL_TEXT = "❌ Отмена"
+
+
+def _all_kb() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="👥 Всем участникам", callback_data="cfg:all")]]
+    )
+
+
+def _confirm_kb(count: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text=f"✅ Отправить ({count})", callback_data="cfg:send"),
+                InlineKeyboardButton(text="❌ Отмена", callback_data="cfg:cancel"),
+            ]
+        ]
+    )
+
+
+@router.message(F.text == "📦 Раздать конфиг", F.from_user.id == ADMIN_ID)
+async def start_distribution(msg: Message, state: FSMContext):
+    await state.set_state(ConfigDistribution.waiting_file)
+    await msg.answer(
+        "📦 Пришли файл конфигурации документом (можно с подписью — она уйдёт вместе с файлом).\n\n"
+        "Файл загружается в Telegram один раз: всем получателям, и сейчас, и в следующий раз, "
+        "уходит уже загруженная копия.",
+        reply_markup=CANCEL_KB,
+    )
+
+
+@router.message(StateFilter(ConfigDistribution), F.text == CANCEL_TEXT)
+async def cancel_distribution(msg: Message, state: FSMContext):
+    await state.clear()
+    await msg.answer("Раздача отменена.", reply_markup=ADMIN_KB)
+
+
+@router.message(StateFilter(ConfigDistribution), F.text.in_(ADMIN_BUTTON_TEXTS))
+async def abort_distribution_on_admin_button(msg: Message, state: FSMContext):
+    await state.clear()
+    await msg.answer("Раздача прервана. Нажми нужную кнопку ещё раз.", reply_markup=ADMIN_KB)
+
+
+@router.message(ConfigDistribution.waiting_file, F.document)
+async def receive_config(msg: Message, state: FSMContext):
+    try:
+        key = await files.receive(msg.bot, msg.document)
+    except ValueError:
+        await msg.answer("⚠️ Файл слишком большой (больше 20 МБ). Пришли другой или нажми «Отмена».")
+        return
+    filename = msg.document.file_name or "config"
+    if msg.caption:
+        # Check the caption's HTML once here, not on every recipient.
+        try:
+            await files.send_document(
+                msg.bot, ADMIN_ID, key, filename, caption=msg.caption, interactive=True
+            )
+        except TelegramBadRequest as exc:
+            await msg.answer(
+                "⚠️ Ошибка HTML-парсинга в подписи:\n"
+                f"<code>{html.escape(str(exc))}</code>\n\n"
+                "Пришли файл с исправленной подписью или нажми «Отмена»."
+            )
+            return
+    await state.update_data(document=key, filename=filename, caption=msg.caption)
+    await state.set_state(ConfigDistribution.waiting_recipients)
+    await msg.answer(
+        "Кому отправить? Пришли список ID, @username или имён — через запятую "
+        "или с новой строки (например, всех, кто на этом сервере). Или нажми кнопку ниже.",
+        reply_markup=_all_kb(),
+    )
+
+
+@router.message(ConfigDistribution.waiting_file)
+async def expect_document(msg: Message):
+    await msg.answer("⚠️ Нужен файл, отправленный документом. Пришли его или нажми «Отмена».")
+
+
+async def _ask_confirm(msg: Message, state: FSMContext, recipients: set[int], unknown: list[str]):
+    members = list_members(ADMIN_ID)
+    data = await state.get_data()
+    await state.update_data(recipients=sorted(recipients))
+    await state.set_state(ConfigDistribution.waiting_confirm)
+    names = ", ".join(html.escape(members[uid].name) for uid in sorted(recipients)[:20])
+    if len(recipients) > 20:
+        names += f" и ещё {len(recipients) - 20}"
+    lines = [f"Отправить <b>{html.escape(data['filename'])}</b> участникам ({len(recipients)}): {names}?"]
+    if unknown:
+        lines.append("")
+        lines.append("Не распознаны (им не отправится):")
+        lines.extend(f"• {html.escape(entry)}" for entry in unknown)
+    await msg.answer("\n".join(lines), reply_markup=_confirm_kb(len(recipients)))
+
+
+@router.message(ConfigDistribution.waiting_recipients, F.text)
+async def receive_recipients(msg: Message, state: FSMContext):
+    recipients, unknown = match_members(msg.text, list_members(ADMIN_ID))
+    if not recipients:
+        await msg.answer("⚠️ Никого не нашёл по этому списку. Попробуй ещё раз или нажми «Отмена».")
+        return
+    await _ask_confirm(msg, state, recipients, unknown)
+
+
+@router.callback_query(ConfigDistribution.waiting_recipients, F.data == "cfg:all")
+async def cb_distribution_all(call: CallbackQuery, state: FSMContext):
+    members = list_members(ADMIN_ID)
+    if not members:
+        await call.answer("Участников пока нет.", show_alert=True)
+        return
+    await call.message.edit_reply_markup(reply_markup=None)
+    await _ask_confirm(call.message, state, set(members), [])
+    await call.answer()
+
+
+@router.callback_query(F.data == "cfg:cancel")
+async def cb_distribution_cancel(call: CallbackQuery, state: FSMContext):
+    await state.clear()
+    await call.message.edit_text("🚫 Раздача отменена.")
+    await call.message.answer("Готов к новым командам.", reply_markup=ADMIN_KB)
+    await call.answer()
+
+
+@router.callback_query(
+    ConfigDistribution.waiting_confirm,
+    F.data == "cfg:send",
+    flags={"idempotent": True},
+)
+async def cb_distribution_send(call: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    await state.clear()
+    await call.message.edit_text("⏳ Отправляю…")
+    await call.answer()
+
+    members = list_members(ADMIN_ID)
+    sent = 0
+    failed: list[str] = []
+    skipped: list[str] = []
+    outcomes: dict[int, str] = {}
+    interrupted = False
+
+    for uid in data["recipients"]:
+        member = members.get(uid)
+        if member is None:
+            continue
+        if not member.reachable:
+            skipped.append(member.name)
+            continue
+        try:
+            await files.send_document(
+                call.bot, uid, data["document"], data["filename"], caption=data["caption"]
+            )
+            sent += 1
+            outcomes[uid] = DELIVERY_OK
+        except TelegramForbiddenError:
+            failed.append(f"{member.name} (заблокировал бота)")
+            outcomes[uid] = DELIVERY_BLOCKED
+        except TelegramBadRequest as exc:
+            failed.append(f"{member.name} ({exc.message})")
+            outcomes[uid] = DELIVERY_FAILED
+        except sender.DeliveryUnavailable:
+            interrupted = True
+            break
+        await asyncio.sleep(0.05)
+
+    await record_delivery(outcomes)
+    await call.message.edit_text("✅ Раздача завершена.")
+
+    report = [f"📦 Отправлено: <b>{sent}</b> из <b>{len(data['recipients'])}</b>."]
+    if interrupted:
+        report.append("⚠️ Раздача прервана: Telegram API недоступен. Остальным не отправлено.")
+    if failed:
+        report.append("")
+        report.append("Не доставлено:")
+        report.extend(f"• {html.escape(item)}" for item in failed)
+    if skipped:
+        report.append("")
+        report.append("Пропущено (бот недоступен, см. «📋 Участники»):")
+        report.extend(f"• {html.escape(name)}" for name in skipped)
+    await call.message.answer("\n".join(report), reply_markup=ADMIN_KB)
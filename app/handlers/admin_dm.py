@@ -1,4 +1,5 @@
 import html
+from collections.abc import Callable
 
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
@@ -11,9 +12,16 @@ from aiogram.types import (
     Message,
 )
 
+from app import files, sender
 from app.config import ADMIN_ID
-from app.keyboards import ADMIN_BUTTON_TEXTS, ADMIN_KB, CANCEL_KB
-from app.storage import list_members
+from app.keyboards import ADMIN_BUTTON_TEXTS, ADMIN_KB, CANCEL_KB, member_picker_kb
+from app.storage import (
+    DELIVERY_BLOCKED,
+    DELIVERY_FAILED,
+    DELIVERY_OK,
+    list_members,
+    record_delivery,
+)
 
 router = Router()
 
@@ -25,10 +33,10 @@ class DirectMessage(StatesGroup):
 def _members_kb() -> InlineKeyboardMarkup:
     members = list_members(ADMIN_ID)
     rows = [
-        [InlineKeyboardButton(text=info["name"], callback_data=f"dm_pick:{uid}")]
-        for uid, info in members.items()
-    ] or [[InlineKeyboardButton(text="(пусто)", callback_data="noop")]]
-    return InlineKeyboardMarkup(inline_keyboard=rows)
+        [InlineKeyboardButton(text=member.name, callback_data=f"dm_pick:{uid}")]
+        for uid, member in members.items()
+    ]
+    return member_picker_kb(rows, "dm_pick")
 
 
 def _confirm_kb(uid: int) -> InlineKeyboardMarkup:
@@ -50,17 +58,17 @@ async def start_dm(msg: Message, state: FSMContext):
 @router.callback_query(F.data.startswith("dm_pick:"))
 async def cb_dm_pick(call: CallbackQuery, state: FSMContext):
     uid = int(call.data.split(":")[1])
-    members = list_members(ADMIN_ID)
-    info = members.get(str(uid))
-    if not info:
+    member = list_members(ADMIN_ID).get(uid)
+    if member is None:
         await call.answer("Участник не найден.", show_alert=True)
         return
 
     await state.set_state(DirectMessage.waiting_text)
-    await state.update_data(target_uid=uid, target_name=info["name"])
+    await state.update_data(target_uid=uid, target_name=member.name)
     await call.message.edit_text(
-        f"✏️ Введи сообщение для <b>{info['name']}</b>.\n\n"
-        "Поддерживается HTML и обычный текст. Можно вставить vpn:// ключ — он придёт как обычный текст для копирования.",
+        f"✏️ Введи сообщение для <b>{member.name}</b>.\n\n"
+        "Поддерживается HTML и обычный текст. Можно вставить vpn:// ключ — он придёт как обычный текст для копирования. "
+        "Файл конфигурации (.conf и т. п.) пришли документом, подпись к нему тоже поддерживает HTML.",
         reply_markup=None,
     )
     await call.message.answer("Или нажми «Отмена»:", reply_markup=CANCEL_KB)
@@ -91,9 +99,11 @@ async def receive_dm_text(msg: Message, state: FSMContext):
     name: str = data["target_name"]
 
     try:
-        await msg.bot.send_message(
+        await sender.send_message(
+            msg.bot,
             ADMIN_ID,
             f"👇 <b>Превью для {name}:</b>\n\n" + text,
+            interactive=True,
         )
     except TelegramBadRequest as exc:
         await msg.answer(
@@ -103,7 +113,7 @@ async def receive_dm_text(msg: Message, state: FSMContext):
         )
         return
 
-    await state.update_data(text=text)
+    await state.update_data(text=text, document=None)
     await state.set_state(DirectMessage.waiting_text)
     await msg.answer(
         f"Отправить это сообщение участнику <b>{name}</b>?",
@@ -111,6 +121,42 @@ async def receive_dm_text(msg: Message, state: FSMContext):
     )
 
 
+@router.message(DirectMessage.waiting_text, F.document)
+async def receive_dm_document(msg: Message, state: FSMContext):
+    data = await state.get_data()
+    uid: int = data["target_uid"]
+    name: str = data["target_name"]
+    filename = msg.document.file_name or "config"
+    try:
+        key = await files.receive(msg.bot, msg.document)
+    except ValueError:
+        await msg.answer("⚠️ Файл слишком большой (больше 20 МБ). Пришли другой или нажми «Отмена».")
+        return
+
+    try:
+        await files.send_document(
+            msg.bot,
+            ADMIN_ID,
+            key,
+            filename,
+            caption=f"👇 <b>Превью для {name}</b>\n\n{msg.caption or ''}",
+            interactive=True,
+        )
+    except TelegramBadRequest as exc:
+        await msg.answer(
+            "⚠️ Ошибка HTML-парсинга в подписи:\n"
+            f"<code>{html.escape(str(exc))}</code>\n\n"
+            "Пришли файл с исправленной подписью или нажми «Отмена»."
+        )
+        return
+
+    await state.update_data(text=None, document=key, filename=filename, caption=msg.caption)
+    await msg.answer(
+        f"Отправить этот файл участнику <b>{name}</b>?",
+        reply_markup=_confirm_kb(uid),
+    )
+
+
 @router.callback_query(F.data == "dm_cancel")
 async def cb_dm_cancel(call: CallbackQuery, state: FSMContext):
     await state.clear()
@@ -119,28 +165,47 @@ async def cb_dm_cancel(call: CallbackQuery, state: FSMContext):
     await call.answer()
 
 
-@router.callback_query(F.data.startswith("dm_send:"))
-async def cb_dm_send(call: CallbackQuery, state: FSMContext):
+@router.callback_query(F.data.startswith("dm_send:"), flags={"idempotent": True})
+async def cb_dm_send(call: CallbackQuery, state: FSMContext, release_tap: Callable[[], None]):
     uid = int(call.data.split(":")[1])
     data = await state.get_data()
     text: str | None = data.get("text")
+    document: str | None = data.get("document")
     name: str = data.get("target_name", str(uid))
 
-    if not text:
+    if not text and not document:
         await state.clear()
         await call.answer("Текст потерян, начни заново.", show_alert=True)
         return
 
     try:
-        await call.bot.send_message(uid, text)
+        if document:
+            await files.send_document(
+                call.bot,
+                uid,
+                document,
+                data["filename"],
+                caption=data.get("caption"),
+                interactive=True,
+            )
+        else:
+            await sender.send_message(call.bot, uid, text, interactive=True)
+        await record_delivery({uid: DELIVERY_OK})
         await state.clear()
         await call.message.edit_text(f"✅ Сообщение отправлено участнику <b>{name}</b>.")
         await call.message.answer("Готов к новым командам.", reply_markup=ADMIN_KB)
+    except sender.DeliveryUnavailable:
+        # Keep the FSM data so the admin can just press "Отправить" again.
+        release_tap()
+        await call.answer("⏳ Telegram сейчас недоступен, попробуй ещё раз позже.", show_alert=True)
+        return
     except TelegramForbiddenError:
+        await record_delivery({uid: DELIVERY_BLOCKED})
         await state.clear()
         await call.message.edit_text(f"❌ Не доставлено: {name} заблокировал бота.")
         await call.message.answer("Готов к новым командам.", reply_markup=ADMIN_KB)
     except TelegramBadRequest as exc:
+        await record_delivery({uid: DELIVERY_FAILED})
         await state.clear()
         await call.message.edit_text(f"❌ Ошибка доставки: <code>{html.escape(exc.message)}</code>")
         await call.message.answer("Готов к новым командам.", reply_markup=ADMIN_KB)
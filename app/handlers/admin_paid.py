@@ -0,0 +1,201 @@
+from datetime import datetime
+
+from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
+
+from app.config import ADMIN_ID
+from app.keyboards import ADMIN_BUTTON_TEXTS, ADMIN_KB, CANCEL_KB, PICKER_LIMIT
+from app.search import match_members
+from app.storage import list_members, set_paid_many, unpaid
+
+router = Router()
+
+
+class MarkPaid(StatesGroup):
+    selecting = State()
+
+
+CANCEL_TEXT = "❌ Отмена"
+
+
+def _debtors(month: str) -> list[tuple[int, str]]:
+    members = list_members(ADMIN_ID)
+    return [(uid, members[uid].name) for uid in unpaid(month, ADMIN_ID)]
+
+
+def _checklist_kb(debtors: list[tuple[int, str]], selected: set[int]) -> InlineKeyboardMarkup:
+    """Checklist of at most ``PICKER_LIMIT`` debtors; the rest are pasted as a list.
+
+    Telegram rejects keyboards with more than 100 buttons. When the list is
+    cut, selected debtors go first so pasted matches stay visible.
+    """
+    shown = debtors
+    if len(debtors) > PICKER_LIMIT:
+        shown = sorted(debtors, key=lambda debtor: debtor[0] not in selected)[:PICKER_LIMIT]
+    rows = [
+        [
+            InlineKeyboardButton(
+                text=f"{'☑️' if uid in selected else '⬜️'} {name}",
+                callback_data=f"mp_toggle:{uid}",
+            )
+        ]
+        for uid, name in shown
+    ]
+    if len(debtors) > PICKER_LIMIT:
+        rows.append(
+            [
+                InlineKeyboardButton(
+                    text=f"…и ещё {len(debtors) - PICKER_LIMIT} — пришли их списком",
+                    callback_data="noop",
+                )
+            ]
+        )
+    rows.append(
+        [
+            InlineKeyboardButton(text="Выбрать всех", callback_data="mp_all"),
+            InlineKeyboardButton(text="Снять выбор", callback_data="mp_none"),
+        ]
+    )
+    rows.append(
+        [
+            InlineKeyboardButton(text=f"✅ Отметить ({len(selected)})", callback_data="mp_commit"),
+            InlineKeyboardButton(text="❌ Отмена", callback_data="mp_cancel"),
+        ]
+    )
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+async def _render(call: CallbackQuery, state: FSMContext) -> None:
+    data = await state.get_data()
+    debtors = _debtors(data["month"])
+    try:
+        await call.message.edit_reply_markup(
+            reply_markup=_checklist_kb(debtors, set(data["selected"]))
+        )
+    except TelegramBadRequest:
+        # "message is not modified" on a repeated tap — nothing to redraw.
+        pass
+
+
+@router.message(F.text == "✅ Отметить оплату", F.from_user.id == ADMIN_ID)
+async def admin_mark_paid_pick(msg: Message, state: FSMContext):
+    month = datetime.now().strftime("%Y-%m")
+    debtors = _debtors(month)
+
+    if not debtors:
+        await msg.answer("🎉 Все участники уже отмечены как оплатившие.")
+        return
+
+    await state.set_state(MarkPaid.selecting)
+    await state.update_data(month=month, selected=[])
+    await msg.answer(
+        "Можно прислать список ID, @username или имён через запятую или с новой строки "
+        "(например, из банковской выписки) — я отмечу найденных.",
+        reply_markup=CANCEL_KB,
+    )
+    await msg.answer(
+        f"Кто уже оплатил за {month}? Отметь всех и нажми «Отметить».",
+        reply_markup=_checklist_kb(debtors, set()),
+    )
+
+
+@router.message(MarkPaid.selecting, F.text == CANCEL_TEXT)
+async def cancel_mark_paid(msg: Message, state: FSMContext):
+    await state.clear()
+    await msg.answer("Отметка оплаты отменена.", reply_markup=ADMIN_KB)
+
+
+@router.message(MarkPaid.selecting, F.text.in_(ADMIN_BUTTON_TEXTS))
+async def abort_mark_paid_on_admin_button(msg: Message, state: FSMContext):
+    await state.clear()
+    await msg.answer(
+        "Отметка оплаты прервана. Нажмите нужную кнопку ещё раз.",
+        reply_markup=ADMIN_KB,
+    )
+
+
+@router.message(MarkPaid.selecting, F.text)
+async def paste_paid_list(msg: Message, state: FSMContext):
+    data = await state.get_data()
+    month: str = data["month"]
+    debtors = _debtors(month)
+    debtor_ids = {uid for uid, _ in debtors}
+
+    matched, unknown = match_members(msg.text, list_members(ADMIN_ID))
+    selected = set(data["selected"]) | (matched & debtor_ids)
+    already = matched - debtor_ids
+    await state.update_data(selected=sorted(selected))
+
+    report = [f"Найдено к отметке: <b>{len(matched & debtor_ids)}</b>."]
+    if already:
+        report.append(f"Уже отмечены ранее: {len(already)}.")
+    if unknown:
+        report.append("")
+        report.append("Не распознано:")
+        report.extend(f"• {item}" for item in unknown)
+    report.append("")
+    report.append("Проверь выбор и нажми «Отметить».")
+    await msg.answer("\n".join(report), reply_markup=_checklist_kb(debtors, selected))
+
+
+@router.callback_query(MarkPaid.selecting, F.data.startswith("mp_toggle:"))
+async def cb_mark_paid_toggle(call: CallbackQuery, state: FSMContext):
+    uid = int(call.data.split(":")[1])
+    selected = set((await state.get_data())["selected"])
+    selected ^= {uid}
+    await state.update_data(selected=sorted(selected))
+    await _render(call, state)
+    await call.answer()
+
+
+@router.callback_query(MarkPaid.selecting, F.data.in_({"mp_all", "mp_none"}))
+async def cb_mark_paid_bulk_select(call: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    selected = [uid for uid, _ in _debtors(data["month"])] if call.data == "mp_all" else []
+    await state.update_data(selected=selected)
+    await _render(call, state)
+    await call.answer()
+
+
+@router.callback_query(MarkPaid.selecting, F.data == "mp_commit", flags={"idempotent": True})
+async def cb_mark_paid_commit(call: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    selected: list[int] = data["selected"]
+    if not selected:
+        await call.answer("Никто не выбран.", show_alert=True)
+        return
+
+    await set_paid_many(selected, data["month"])
+    await state.clear()
+    await call.message.edit_text(f"✅ Оплата за {data['month']} отмечена: {len(selected)} чел.")
+    await call.message.answer("Готов к новым командам.", reply_markup=ADMIN_KB)
+    await call.answer("Отметил как оплачено.")
+
+
+@router.callback_query(F.data.startswith("markpaid:"))
+async def cb_mark_paid_outdated(call: CallbackQuery):
+    # One-tap lists sent before the checklist existed still carry these buttons.
+    await call.answer(
+        "Этот список устарел. Нажми «✅ Отметить оплату», чтобы открыть новый.",
+        show_alert=True,
+    )
+    try:
+        await call.message.edit_reply_markup(reply_markup=None)
+    except TelegramBadRequest:
+        pass
+
+
+@router.callback_query(F.data == "mp_cancel")
+async def cb_mark_paid_cancel(call: CallbackQuery, state: FSMContext):
+    await state.clear()
+    await call.message.edit_text("Отметка оплаты отменена.")
+    await call.message.answer("Готов к новым командам.", reply_markup=ADMIN_KB)
+    await call.answer()
@@ -60,7 +60,7 @@ async def process_price(msg: Message, state: FSMContext):
         return
 
     formatted = str(int(value)) if value.is_integer() else f"{value:.2f}"
-    set_setting("price", formatted)
+    await set_setting("price", formatted)
     await msg.answer(
         f"✅ Сумма обновлена: <b>{formatted} ₽</b>.\n"
         "В следующих напоминаниях участники увидят новую сумму.",
@@ -100,7 +100,7 @@ async def process_info(msg: Message, state: FSMContext):
     if not new_info:
         await msg.answer("⚠️ Пустая строка. Введите реквизиты или нажмите «Отмена».")
         return
-    set_setting("payment_info", new_info)
+    await set_setting("payment_info", new_info)
     await msg.answer(
         f"✅ Реквизиты обновлены: <b>{new_info}</b>.",
         reply_markup=ADMIN_KB,
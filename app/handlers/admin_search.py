@@ -0,0 +1,175 @@
+from datetime import datetime
+
+from aiogram import F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Message,
+)
+
+from app.config import ADMIN_ID
+from app.keyboards import ADMIN_BUTTON_TEXTS, ADMIN_KB, CANCEL_KB
+from app.models import Member
+from app.search import index
+from app.storage import get_member_stats, get_user
+from app.texts import build_member_card
+
+router = Router()
+
+
+class MemberSearch(StatesGroup):
+    query = State()
+
+
+CANCEL_TEXT = "❌ Отмена"
+
+# Callback prefix of the buttons in the results -> prompt shown above them.
+ACTIONS = {
+    "card": "Кого показать?",
+    "dm_pick": "Кому написать?",
+    "forceping": "Кому напомнить?",
+    "delask": "Кого удалить?",
+}
+
+RESULTS_LIMIT = 10
+# Telegram shows at most 50 inline results.
+INLINE_LIMIT = 20
+
+
+def _label(member: Member) -> str:
+    return f"{member.name} (@{member.username})" if member.username else member.name
+
+
+def _results_kb(uids: list[int], action: str) -> InlineKeyboardMarkup:
+    rows = []
+    for uid in uids:
+        member = get_user(uid)
+        if member is not None:
+            rows.append(
+                [InlineKeyboardButton(text=_label(member), callback_data=f"{action}:{uid}")]
+            )
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def _card_kb(uid: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="✉️ Написать", callback_data=f"dm_pick:{uid}"),
+                InlineKeyboardButton(text="👥 Напомнить", callback_data=f"forceping:{uid}"),
+            ],
+            [InlineKeyboardButton(text="🗑 Удалить", callback_data=f"delask:{uid}")],
+        ]
+    )
+
+
+async def _show_results(msg: Message, query: str, action: str) -> bool:
+    uids = index.search(query, RESULTS_LIMIT)
+    if not uids:
+        return False
+    more = "" if len(uids) < RESULTS_LIMIT else "\n<i>Показаны первые совпадения — уточни запрос.</i>"
+    await msg.answer(f"🔍 {ACTIONS[action]}{more}", reply_markup=_results_kb(uids, action))
+    return True
+
+
+async def _show_card(msg: Message, uid: int) -> None:
+    member = get_user(uid)
+    if member is None or uid == ADMIN_ID:
+        await msg.answer("Участник не найден.")
+        return
+    await msg.answer(
+        build_member_card(member, get_member_stats(uid), datetime.now()),
+        reply_markup=_card_kb(uid),
+    )
+
+
+@router.callback_query(F.data.startswith("search:"), F.from_user.id == ADMIN_ID)
+async def cb_search(call: CallbackQuery, state: FSMContext):
+    action = call.data.split(":", 1)[1]
+    if action not in ACTIONS:
+        await call.answer()
+        return
+    await state.set_state(MemberSearch.query)
+    await state.update_data(action=action)
+    await call.message.answer(
+        "Введи часть имени, @username или ID участника:", reply_markup=CANCEL_KB
+    )
+    await call.answer()
+
+
+@router.message(Command("find"), F.from_user.id == ADMIN_ID)
+async def cmd_find(msg: Message, command: CommandObject, state: FSMContext):
+    query = (command.args or "").strip()
+    if not query:
+        await state.set_state(MemberSearch.query)
+        await state.update_data(action="card")
+        await msg.answer("Введи часть имени, @username или ID участника:", reply_markup=CANCEL_KB)
+        return
+    if not await _show_results(msg, query, "card"):
+        await msg.answer("Никого не нашлось.")
+
+
+@router.message(MemberSearch.query, F.text == CANCEL_TEXT)
+async def cancel_search(msg: Message, state: FSMContext):
+    await state.clear()
+    await msg.answer("Отменено.", reply_markup=ADMIN_KB)
+
+
+@router.message(MemberSearch.query, F.text.in_(ADMIN_BUTTON_TEXTS))
+async def abort_search_on_admin_button(msg: Message, state: FSMContext):
+    await state.clear()
+    await msg.answer("Поиск прерван. Нажми нужную кнопку ещё раз.", reply_markup=ADMIN_KB)
+
+
+@router.message(MemberSearch.query, F.text)
+async def receive_query(msg: Message, state: FSMContext):
+    data = await state.get_data()
+    if not await _show_results(msg, msg.text, data.get("action", "card")):
+        await msg.answer("⚠️ Никого не нашлось. Попробуй иначе или нажми «Отмена».")
+        return
+    await state.clear()
+    await msg.answer("Готов к новым командам.", reply_markup=ADMIN_KB)
+
+
+@router.message(Command("member"), F.from_user.id == ADMIN_ID)
+async def cmd_member(msg: Message, command: CommandObject):
+    arg = (command.args or "").strip()
+    if not arg.isdigit():
+        await msg.answer("Формат: <code>/member ID</code>. Найти ID: <code>/find имя</code>.")
+        return
+    await _show_card(msg, int(arg))
+
+
+@router.callback_query(F.data.startswith("card:"), F.from_user.id == ADMIN_ID)
+async def cb_card(call: CallbackQuery):
+    await _show_card(call.message, int(call.data.split(":")[1]))
+    await call.answer()
+
+
+@router.inline_query()
+async def inline_members(query: InlineQuery):
+    # Inline mode is public once enabled, so nobody else may list members.
+    if query.from_user.id != ADMIN_ID or not query.query.strip():
+        await query.answer([], cache_time=5, is_personal=True)
+        return
+    results = []
+    for uid in index.search(query.query, INLINE_LIMIT):
+        member = get_user(uid)
+        if member is None:
+            continue
+        results.append(
+            InlineQueryResultArticle(
+                id=str(uid),
+                title=member.name,
+                description=f"@{member.username} · ID {uid}" if member.username else f"ID {uid}",
+                input_message_content=InputTextMessageContent(message_text=f"/member {uid}"),
+            )
+        )
+    await query.answer(results, cache_time=0, is_personal=True)
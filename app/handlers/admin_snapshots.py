@@ -0,0 +1,89 @@
+from aiogram import F, Router
+from aiogram.filters import Command
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+from app import snapshots
+from app.config import ADMIN_ID
+
+router = Router()
+
+# How many of the newest snapshots /restore offers.
+RESTORE_CHOICES = 10
+
+
+def _label(name: str) -> str:
+    return snapshots.snapshot_time(name).strftime("%d.%m.%Y %H:%M")
+
+
+@router.message(Command("snapshot"), F.from_user.id == ADMIN_ID)
+async def cmd_snapshot(msg: Message):
+    path = snapshots.take_snapshot()
+    if path is None:
+        await msg.answer("Состояние не менялось с последнего снимка — новый не нужен.")
+        return
+    await msg.answer(f"📸 Снимок сохранён: <code>{path.name}</code>")
+
+
+@router.message(Command("restore"), F.from_user.id == ADMIN_ID)
+async def cmd_restore(msg: Message):
+    names = [path.name for path in snapshots.list_snapshots()[:RESTORE_CHOICES]]
+    if not names:
+        await msg.answer("Снимков пока нет.")
+        return
+    rows = [
+        [InlineKeyboardButton(text=_label(name), callback_data=f"restore_pick:{name}")]
+        for name in names
+    ]
+    await msg.answer(
+        "Из какого снимка восстановить данные?",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=rows),
+    )
+
+
+@router.callback_query(F.data.startswith("restore_pick:"), F.from_user.id == ADMIN_ID)
+async def cb_restore_pick(call: CallbackQuery):
+    name = call.data.split(":", 1)[1]
+    try:
+        data = snapshots.load_snapshot(name)
+    except ValueError as exc:
+        await call.answer(f"Снимок не подходит: {exc}", show_alert=True)
+        return
+
+    kb = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="✅ Восстановить", callback_data=f"restore_yes:{name}"),
+                InlineKeyboardButton(text="❌ Отмена", callback_data="restore_no"),
+            ]
+        ]
+    )
+    await call.message.edit_text(
+        f"Снимок от <b>{_label(name)}</b>:\n"
+        f"• пользователей: {len(data['users'])}\n"
+        f"• месяцев с оплатами: {len(data['payments'])}\n\n"
+        "Текущие данные будут заменены (перед этим сохранится их снимок). Продолжить?",
+        reply_markup=kb,
+    )
+    await call.answer()
+
+
+@router.callback_query(
+    F.data.startswith("restore_yes:"),
+    F.from_user.id == ADMIN_ID,
+    flags={"idempotent": True},
+)
+async def cb_restore_yes(call: CallbackQuery):
+    name = call.data.split(":", 1)[1]
+    try:
+        await snapshots.restore_snapshot(name)
+    except ValueError as exc:
+        await call.answer(f"Не удалось восстановить: {exc}", show_alert=True)
+        return
+    await call.message.edit_text(f"♻️ Данные восстановлены из снимка от <b>{_label(name)}</b>.")
+    await call.answer()
+
+
+@router.callback_query(F.data == "restore_no", F.from_user.id == ADMIN_ID)
+async def cb_restore_no(call: CallbackQuery):
+    await call.message.edit_text("Восстановление отменено.")
+    await call.answer()
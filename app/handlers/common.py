@@ -1,12 +1,17 @@
+import logging
+
 from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
+from app import joins, sender
 from app.config import ADMIN_ID
 from app.keyboards import ADMIN_KB, USER_KB
-from app.storage import add_user, list_members, update_user_contact
+from app.storage import add_user, get_user, reset_delivery, update_user_contact
 from app.texts import build_welcome_text
 
 router = Router()
+log = logging.getLogger(__name__)
 
 
 ADMIN_HELP_TEXT = (
@@ -14,85 +19,112 @@ ADMIN_HELP_TEXT = (
     "• 📢 Напомнить всем\n"
     "• 👥 Напомнить участнику\n"
     "• 📣 Объявление — разослать сообщение всем участникам\n"
-    "• ✉️ Написать участнику — личное сообщение одному (для раздачи конфигов)\n"
+    "• ✉️ Написать участнику — личное сообщение или файл одному (для раздачи конфигов)\n"
+    "• 📦 Раздать конфиг — отправить файл всем или списку участников (например, одного сервера)\n"
     "• 📋 Участники — открыть чат\n"
     "• 🗑 Удалить участника\n"
     "• ➕ Добавить участника\n"
     "• ✅ Отметить оплату — вручную отметить платеж\n"
+    "• <code>/billing_day ID ДЕНЬ</code> — личный день оплаты участника "
+    "(<code>/billing_day ID -</code> — вернуть общий)\n"
     "• 💰 Изменить сумму — поменять сумму в напоминании\n"
     "• 💳 Изменить реквизиты — поменять реквизиты для перевода\n"
     "• 📖 Инструкции — описания протоколов и подключения\n"
-    "• 📊 Статистика"
+    "• <code>/export [С [ПО]]</code> — выгрузка участников и оплат в CSV\n"
+    "• <code>/snapshot</code>, <code>/restore</code> — снимки данных и откат к ним\n"
+    "• <code>/metrics</code> — счётчики работы бота (антифлуд, отправка)\n"
+    "• 📊 Статистика, <code>/stats</code> — оплаты по месяцам, опоздания, серии\n"
+    "• <code>/find имя</code> — поиск участника по имени, @username или ID, "
+    "<code>/member ID</code> — карточка участника. В списках выбора есть кнопка «🔍 Найти». "
+    "Если в @BotFather включён inline-режим, искать можно и так: "
+    "<code>@имя_бота запрос</code>"
 )
 
 
 @router.message(F.text == "/start")
 async def cmd_start(msg: Message):
     if msg.from_user.id == ADMIN_ID:
-        add_user(msg.from_user.id, msg.from_user.full_name, msg.from_user.username, "admin")
+        await add_user(msg.from_user.id, msg.from_user.full_name, msg.from_user.username, "admin")
         await msg.answer(
             "👋 Привет, <b>администратор</b>!\n\n" + ADMIN_HELP_TEXT,
             reply_markup=ADMIN_KB,
         )
         return
 
-    members = list_members(ADMIN_ID)
-    if str(msg.from_user.id) in members:
-        update_user_contact(
+    member = get_user(msg.from_user.id)
+    if member is not None:
+        await update_user_contact(
             msg.from_user.id, msg.from_user.full_name, msg.from_user.username
         )
-        await msg.answer(build_welcome_text(), reply_markup=USER_KB)
+        await reset_delivery(msg.from_user.id)
+        await msg.answer(build_welcome_text(member.billing_day), reply_markup=USER_KB)
         return
 
-    await msg.answer("🔄 Заявка на подключение отправлена администратору. Ожидайте решения.")
+    if joins.digest.submit(msg.bot, msg.from_user.id, msg.from_user.full_name):
+        await msg.answer("🔄 Заявка на подключение отправлена администратору. Ожидайте решения.")
+    else:
+        await msg.answer("⏳ Заявка уже у администратора. Ожидайте решения.")
 
-    kb_admin = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="✅ Принять", callback_data=f"join_ok:{msg.from_user.id}"),
-                InlineKeyboardButton(text="❌ Отклонить", callback_data=f"join_no:{msg.from_user.id}"),
-            ]
-        ]
-    )
-    await msg.bot.send_message(
-        ADMIN_ID,
-        "⚠️ Запрос на подключение от "
-        f"<a href='tg://user?id={msg.from_user.id}'>{msg.from_user.full_name}</a>",
-        reply_markup=kb_admin,
-    )
+
+async def _report_decision(call: CallbackQuery, text: str) -> None:
+    """Refresh the join digest, or edit a standalone request message."""
+    if call.message.message_id == joins.digest.message_id:
+        try:
+            await joins.digest.publish(call.bot)
+        except sender.DeliveryUnavailable:
+            pass
+        await call.answer(text, show_alert=True)
+        return
+    await call.message.edit_text(text)
+    await call.answer()
 
 
-@router.callback_query(F.data.startswith("join_ok:"))
+@router.callback_query(F.data.startswith("join_ok:"), flags={"idempotent": True})
 async def cb_join_ok(call: CallbackQuery):
     uid = int(call.data.split(":")[1])
+    joins.digest.resolve(uid)
 
-    if str(uid) in list_members(ADMIN_ID):
-        await call.answer("Уже в списке.", show_alert=True)
+    if get_user(uid) is not None:
+        await _report_decision(call, "Уже в списке.")
         return
 
     chat = await call.bot.get_chat(uid)
-    add_user(uid, chat.full_name, chat.username, "member")
+    await add_user(uid, chat.full_name, chat.username, "member")
 
-    await call.bot.send_message(uid, build_welcome_text(), reply_markup=USER_KB)
-    await call.message.edit_text("✅ Участник добавлен.")
-    await call.answer()
+    try:
+        await sender.send_message(
+            call.bot, uid, build_welcome_text(), reply_markup=USER_KB, interactive=True
+        )
+    except (TelegramBadRequest, TelegramForbiddenError, sender.DeliveryUnavailable):
+        await _report_decision(
+            call,
+            f"✅ {chat.full_name} добавлен(а), но приветствие не доставлено — "
+            "попроси нажать /start.",
+        )
+        return
+    await _report_decision(call, f"✅ {chat.full_name} добавлен(а).")
 
 
-@router.callback_query(F.data.startswith("join_no:"))
+@router.callback_query(F.data.startswith("join_no:"), flags={"idempotent": True})
 async def cb_join_no(call: CallbackQuery):
     uid = int(call.data.split(":")[1])
+    joins.digest.resolve(uid)
 
     kb_no = InlineKeyboardMarkup(
         inline_keyboard=[[InlineKeyboardButton(text="Написать админу", url=f"tg://user?id={ADMIN_ID}")]]
     )
 
-    await call.bot.send_message(
-        uid,
-        "❌ Администратор отклонил заявку на подключение.\nСвяжитесь с ним для уточнения.",
-        reply_markup=kb_no,
-    )
-    await call.message.edit_text("🚫 Заявка отклонена.")
-    await call.answer()
+    try:
+        await sender.send_message(
+            call.bot,
+            uid,
+            "❌ Администратор отклонил заявку на подключение.\nСвяжитесь с ним для уточнения.",
+            reply_markup=kb_no,
+            interactive=True,
+        )
+    except (TelegramBadRequest, TelegramForbiddenError, sender.DeliveryUnavailable):
+        pass
+    await _report_decision(call, "🚫 Заявка отклонена.")
 
 
 @router.callback_query(F.data == "noop")
@@ -2,26 +2,28 @@ from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery, Message
 
-from app.keyboards import info_back_kb, info_list_kb
-from app.texts import INFO_INTRO, INFO_TEXTS
+from app import instructions
+from app.keyboards import INFO_BACK_KB
 
 router = Router()
 
 
 @router.message(F.text.in_({"📖 Инструкции", "/instructions"}))
 async def msg_instructions(msg: Message):
-    await msg.answer(INFO_INTRO, reply_markup=info_list_kb(), disable_web_page_preview=True)
+    library = instructions.library()
+    await msg.answer(library.intro, reply_markup=library.list_kb, disable_web_page_preview=True)
 
 
 @router.callback_query(F.data == "info:list")
 async def cb_info_list(call: CallbackQuery):
+    library = instructions.library()
     try:
         await call.message.edit_text(
-            INFO_INTRO, reply_markup=info_list_kb(), disable_web_page_preview=True
+            library.intro, reply_markup=library.list_kb, disable_web_page_preview=True
         )
     except TelegramBadRequest:
         await call.message.answer(
-            INFO_INTRO, reply_markup=info_list_kb(), disable_web_page_preview=True
+            library.intro, reply_markup=library.list_kb, disable_web_page_preview=True
         )
     await call.answer()
 
@@ -29,14 +31,17 @@ async def cb_info_list(call: CallbackQuery):
 @router.callback_query(F.data.startswith("info:") & ~F.data.in_({"info:list"}))
 async def cb_info_show(call: CallbackQuery):
     key = call.data.split(":", 1)[1]
-    text = INFO_TEXTS.get(key)
-    if text is None:
+    page = instructions.library().pages.get(key)
+    if page is None:
         await call.answer("Раздел не найден.", show_alert=True)
         return
 
-    kb = info_back_kb()
     try:
-        await call.message.edit_text(text, reply_markup=kb, disable_web_page_preview=True)
+        await call.message.edit_text(
+            page.text, reply_markup=INFO_BACK_KB, disable_web_page_preview=True
+        )
     except TelegramBadRequest:
-        await call.message.answer(text, reply_markup=kb, disable_web_page_preview=True)
+        await call.message.answer(
+            page.text, reply_markup=INFO_BACK_KB, disable_web_page_preview=True
+        )
     await call.answer()
@@ -1,26 +1,52 @@
+import html
 from datetime import datetime
 
 from aiogram import F, Router
-from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+    User,
+)
 
+from app import payment_digest
 from app.config import ADMIN_ID
-from app.storage import set_paid, unpaid
-from app.texts import build_welcome_text
+from app.storage import get_member_stats, get_user, set_paid
+from app.texts import build_status_text, build_welcome_text
 
 router = Router()
 
 
+async def _notify_admin_paid(bot, user: User, month: str) -> None:
+    if user.id == ADMIN_ID:
+        return
+    if get_user(user.id) is None:
+        # Not a member (e.g. removed, or typed /paid by hand): worth a look now.
+        await payment_digest.digest.urgent(
+            bot,
+            f"⚠️ Оплату за {month} отметил не участник: "
+            f"<a href='tg://user?id={user.id}'>{html.escape(user.full_name)}</a> "
+            f"(ID <code>{user.id}</code>)",
+        )
+        return
+    payment_digest.digest.add(bot, user.full_name, month)
+
+
 @router.message(F.text.in_({"ℹ️ Информация", "/info"}))
 async def msg_info(msg: Message):
-    await msg.answer(build_welcome_text())
+    member = get_user(msg.from_user.id)
+    await msg.answer(build_welcome_text(member.billing_day if member else None))
 
 
 @router.message(F.text.in_({"💰 Мой статус", "/my_status"}))
 async def msg_my_status(msg: Message):
-    month = datetime.now().strftime("%Y-%m")
-    debtors = unpaid(month, ADMIN_ID)
-    status = "✅ Оплачено" if msg.from_user.id not in debtors else "⏳ Ожидается"
-    await msg.answer(f"<b>Статус за {month}</b>: {status}")
+    member = get_user(msg.from_user.id)
+    if member is None:
+        await msg.answer("Вас нет в списке участников. Нажмите /start, чтобы отправить заявку.")
+        return
+    history = get_member_stats(msg.from_user.id)
+    await msg.answer(build_status_text(member, history, datetime.now()))
 
 
 @router.message(F.text == "🆘 Помощь")
@@ -33,24 +59,18 @@ async def msg_help(msg: Message):
     await msg.answer("Если возникли вопросы — напишите администратору:", reply_markup=kb)
 
 
-@router.callback_query(F.data == "paid")
+@router.callback_query(F.data == "paid", flags={"idempotent": True})
 async def cb_paid(call: CallbackQuery):
     month = datetime.now().strftime("%Y-%m")
-    set_paid(call.from_user.id, month)
+    await set_paid(call.from_user.id, month)
     await call.message.edit_text("✅ Спасибо, оплата зафиксирована!")
-    if call.from_user.id != ADMIN_ID:
-        await call.bot.send_message(
-            ADMIN_ID, f"{call.from_user.full_name} оплатил VPN за {month}"
-        )
+    await _notify_admin_paid(call.bot, call.from_user, month)
     await call.answer()
 
 
 @router.message(F.text == "/paid")
 async def msg_paid(msg: Message):
     month = datetime.now().strftime("%Y-%m")
-    set_paid(msg.from_user.id, month)
+    await set_paid(msg.from_user.id, month)
     await msg.answer("✅ Спасибо, оплата зафиксирована!")
-    if msg.from_user.id != ADMIN_ID:
-        await msg.bot.send_message(
-            ADMIN_ID, f"{msg.from_user.full_name} оплатил VPN за {month}"
-        )
+    await _notify_admin_paid(msg.bot, msg.from_user, month)
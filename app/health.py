@@ -0,0 +1,133 @@
+"""Liveness of the bot: event-loop lag, job durations, last handled update.
+
+A monitor task sleeps for :data:`MONITOR_INTERVAL` and measures how late it
+wakes up. That delay is time the loop spent in code that did not yield —
+a synchronous state write, a long loop over members — during which no
+update was handled. Lag over ``LOOP_LAG_WARN_SECONDS`` is logged. The
+figures go to :mod:`app.metrics` as ``health.*`` gauges and are served as
+JSON by a small HTTP server on ``HEALTH_PORT`` for Docker's HEALTHCHECK:
+
+* ``/health`` — 200 while the monitor keeps ticking and the last lag is
+  under ``LOOP_LAG_FAIL_SECONDS``, 503 otherwise. A loop that is stuck for
+  good does not answer at all, which the healthcheck's timeout catches.
+* ``/ready`` — 200 once polling has started and the Bot API circuit
+  breaker is closed.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any
+
+from aiohttp import web
+
+from app import metrics, sender
+
+log = logging.getLogger(__name__)
+
+MONITOR_INTERVAL = 1.0
+
+
+class HealthMonitor:
+    def __init__(self) -> None:
+        self.warn_lag = 0.5
+        self.fail_lag = 30.0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.ready = False
+        self._ticked: float | None = None
+        self._last_update: float | None = None
+        self._started = time.monotonic()
+        # job id -> (duration in seconds, succeeded, finished at)
+        self._jobs: dict[str, tuple[float, bool, datetime]] = {}
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(MONITOR_INTERVAL)
+            self._ticked = loop.time()
+            self.lag = max(0.0, self._ticked - started - MONITOR_INTERVAL)
+            self.max_lag = max(self.max_lag, self.lag)
+            metrics.gauge("health.loop_lag_ms", round(self.lag * 1000))
+            metrics.gauge("health.loop_lag_max_ms", round(self.max_lag * 1000))
+            if self.lag > self.warn_lag:
+                metrics.incr("health.lag_warnings")
+                log.warning("Event loop was blocked for %.2f s", self.lag)
+
+    def record_job(self, job_id: str, seconds: float, ok: bool) -> None:
+        self._jobs[job_id] = (seconds, ok, datetime.now())
+        metrics.gauge(f"health.job.{job_id}_seconds", round(seconds, 2))
+        if not ok:
+            metrics.incr(f"health.job.{job_id}_failed")
+
+    async def track_update(
+        self,
+        handler: Callable[[Any, dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: dict[str, Any],
+    ) -> Any:
+        """Outer update middleware: remembers when an update was last handled."""
+        result = await handler(event, data)
+        self._last_update = time.monotonic()
+        return result
+
+    async def mark_ready(self) -> None:
+        self.ready = True
+
+    def healthy(self) -> bool:
+        if self._ticked is None:
+            return True
+        stalled = asyncio.get_running_loop().time() - self._ticked - MONITOR_INTERVAL
+        return max(self.lag, stalled) < self.fail_lag
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            "healthy": self.healthy(),
+            "ready": self.ready and not sender.breaker.is_open,
+            "uptime_seconds": round(now - self._started),
+            "loop_lag_ms": round(self.lag * 1000),
+            "loop_lag_max_ms": round(self.max_lag * 1000),
+            "last_update_seconds_ago": (
+                None if self._last_update is None else round(now - self._last_update)
+            ),
+            "breaker_open": sender.breaker.is_open,
+            "jobs": {
+                job_id: {
+                    "seconds": round(seconds, 2),
+                    "ok": ok,
+                    "finished": finished.isoformat(timespec="seconds"),
+                }
+                for job_id, (seconds, ok, finished) in self._jobs.items()
+            },
+        }
+
+    async def _health(self, request: web.Request) -> web.Response:
+        status = self.status()
+        return web.json_response(status, status=200 if status["healthy"] else 503)
+
+    async def _ready(self, request: web.Request) -> web.Response:
+        status = self.status()
+        return web.json_response(status, status=200 if status["ready"] else 503)
+
+    async def serve(self, host: str, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_get("/health", self._health)
+        app.router.add_get("/ready", self._ready)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        log.info("Health endpoint listening on %s:%d", host, port)
+        return runner
+
+    def start(self, warn_lag: float, fail_lag: float) -> None:
+        self.warn_lag = warn_lag
+        self.fail_lag = fail_lag
+        self._task = asyncio.create_task(self._run())
+
+
+monitor = HealthMonitor()
@@ -0,0 +1,206 @@
+"""Instruction pages ("📖 Инструкции") loaded from a content directory.
+
+Every ``<key>.html`` in ``INSTRUCTIONS_DIR`` is one page; ``_intro.html``
+is the text above the list. A page starts with front matter::
+
+    ---
+    title: 🟣 Amnezia • X-Ray • Астана ⭐
+    order: 10
+    ---
+    <b>Telegram HTML</b> of the page…
+
+``title`` is the button label, pages are listed by ``order`` then key.
+The directory is read and validated (known fields, Telegram's HTML subset,
+balanced tags, message length) on first use; the pages and the list
+keyboard are then served from memory. A watcher polls the files' mtimes and swaps in
+a new library when something changed; a broken edit is logged and the
+previous library stays in use, so adding a server is a file edit, not a
+redeploy.
+"""
+
+import asyncio
+import logging
+import pathlib
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+from aiogram.types import InlineKeyboardMarkup
+
+from app.config import INSTRUCTIONS_DIR
+from app.keyboards import info_list_kb
+
+log = logging.getLogger(__name__)
+
+CONTENT_DIR = (
+    pathlib.Path(INSTRUCTIONS_DIR)
+    if INSTRUCTIONS_DIR
+    else pathlib.Path(__file__).resolve().parent / "content" / "instructions"
+)
+INTRO_FILE = "_intro.html"
+
+_KEY_RE = re.compile(r"^[a-z0-9_]{1,48}$")
+_FIELDS = frozenset({"title", "order"})
+# Tags Telegram accepts with parse_mode=HTML.
+_ALLOWED_TAGS = frozenset(
+    "a b blockquote code del em i ins pre s span strike strong tg-emoji tg-spoiler u".split()
+)
+MAX_TEXT_LENGTH = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class Page:
+    key: str
+    title: str
+    order: int
+    text: str
+
+
+@dataclass(frozen=True, slots=True)
+class Library:
+    intro: str
+    pages: dict[str, Page]
+    list_kb: InlineKeyboardMarkup
+
+
+class _TagChecker(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.open: list[str] = []
+        self.length = 0
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag not in _ALLOWED_TAGS:
+            raise ValueError(f"tag <{tag}> is not supported by Telegram")
+        self.open.append(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self.open or self.open[-1] != tag:
+            raise ValueError(f"unexpected </{tag}>")
+        self.open.pop()
+
+    def handle_data(self, data: str) -> None:
+        self.length += len(data)
+
+
+def validate_html(text: str) -> None:
+    """Raise ValueError unless Telegram will accept ``text`` as one message."""
+    checker = _TagChecker()
+    checker.feed(text)
+    checker.close()
+    if checker.open:
+        raise ValueError(f"unclosed <{checker.open[-1]}>")
+    if not 0 < checker.length <= MAX_TEXT_LENGTH:
+        raise ValueError(f"text is {checker.length} characters, limit is {MAX_TEXT_LENGTH}")
+
+
+def parse_page(key: str, source: str) -> Page:
+    if not _KEY_RE.match(key) or key == "list":
+        raise ValueError("file name must be lowercase latin letters, digits and _ (not 'list')")
+    head, sep, body = source.partition("\n---\n")
+    if not source.startswith("---\n") or not sep:
+        raise ValueError("no front matter (--- ... ---) at the top")
+    meta: dict[str, str] = {}
+    for line in head.splitlines()[1:]:
+        name, colon, value = line.partition(":")
+        name = name.strip()
+        if not colon or name not in _FIELDS:
+            raise ValueError(f"unknown front matter line {line!r}")
+        meta[name] = value.strip()
+    if not meta.get("title"):
+        raise ValueError("title is missing")
+    try:
+        order = int(meta.get("order", "0"))
+    except ValueError:
+        raise ValueError("order must be an integer") from None
+    text = body.strip()
+    validate_html(text)
+    return Page(key, meta["title"], order, text)
+
+
+def load(directory: pathlib.Path) -> Library:
+    """Read and validate every page; ValueError names the broken file."""
+    intro = ""
+    pages: list[Page] = []
+    for path in sorted(directory.glob("*.html")):
+        try:
+            source = path.read_text(encoding="utf-8")
+            if path.name == INTRO_FILE:
+                intro = source.strip()
+                validate_html(intro)
+            elif not path.name.startswith("_"):
+                pages.append(parse_page(path.stem, source))
+        except (OSError, UnicodeDecodeError, ValueError) as exc:
+            raise ValueError(f"{path.name}: {exc}") from exc
+    if not intro:
+        raise ValueError(f"{INTRO_FILE} is missing or empty")
+    pages.sort(key=lambda page: (page.order, page.key))
+    return Library(
+        intro=intro,
+        pages={page.key: page for page in pages},
+        list_kb=info_list_kb([(page.key, page.title) for page in pages]),
+    )
+
+
+def _stamp(directory: pathlib.Path) -> tuple:
+    return tuple(
+        (path.name, stat.st_mtime_ns, stat.st_size)
+        for path in sorted(directory.glob("*.html"))
+        for stat in (path.stat(),)
+    )
+
+
+_library: Library | None = None
+_library_stamp: tuple | None = None
+
+
+def library() -> Library:
+    """The current pages, loaded on first use."""
+    global _library, _library_stamp
+    if _library is None:
+        stamp = _stamp(CONTENT_DIR)
+        _library = load(CONTENT_DIR)
+        _library_stamp = stamp
+        log.info("Loaded %d instruction pages from %s", len(_library.pages), CONTENT_DIR)
+    return _library
+
+
+def reload_if_changed() -> bool:
+    """Swap in the directory's pages if any file changed since the last load.
+
+    A directory that fails validation is logged and skipped; the pages
+    already in memory keep being served. Returns True if pages were replaced.
+    """
+    global _library, _library_stamp
+    try:
+        stamp = _stamp(CONTENT_DIR)
+    except OSError:
+        log.exception("Cannot read instructions directory %s", CONTENT_DIR)
+        return False
+    if stamp == _library_stamp:
+        return False
+    _library_stamp = stamp
+    try:
+        _library = load(CONTENT_DIR)
+    except ValueError as exc:
+        log.error("Instructions not reloaded, keeping the previous ones: %s", exc)
+        return False
+    log.info("Reloaded %d instruction pages", len(_library.pages))
+    return True
+
+
+async def _watch(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        reload_if_changed()
+
+
+_watch_task: asyncio.Task | None = None
+
+
+def start_watcher(interval: float) -> None:
+    """Load the pages now, so broken content stops the start, then poll."""
+    global _watch_task
+    library()
+    if interval > 0:
+        _watch_task = asyncio.create_task(_watch(interval))
@@ -0,0 +1,166 @@
+"""Pending join requests, collapsed into one digest message for the admin.
+
+A non-member pressing /start lands in the pending table instead of
+producing a fresh admin message. Repeated presses within
+``JOIN_COOLDOWN_MINUTES`` are ignored. A background task re-renders a
+single digest message at most every ``JOIN_DIGEST_SECONDS``, with an
+accept/reject button pair per applicant. It edits the message in place
+while it has applicants and sends a new one (so the admin gets a
+notification) after it was emptied. Requests older than
+``JOIN_REQUEST_TTL_HOURS`` expire.
+
+The table is in memory only: after a restart applicants simply press
+/start again.
+"""
+
+import asyncio
+import html
+import logging
+import time
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from app import sender
+from app.config import (
+    ADMIN_ID,
+    JOIN_COOLDOWN_MINUTES,
+    JOIN_DIGEST_SECONDS,
+    JOIN_REQUEST_TTL_HOURS,
+)
+
+log = logging.getLogger(__name__)
+
+# Telegram caps an inline keyboard at 100 buttons; two per applicant.
+MAX_LISTED = 40
+
+
+@dataclass(slots=True)
+class JoinRequest:
+    uid: int
+    name: str
+    first_seen: float
+    last_seen: float
+    attempts: int = 1
+
+
+class JoinDigest:
+    def __init__(self) -> None:
+        self._pending: dict[int, JoinRequest] = {}
+        self._message_id: int | None = None
+        self._dirty = False
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def message_id(self) -> int | None:
+        return self._message_id
+
+    def submit(self, bot: Bot, uid: int, name: str, now: float | None = None) -> bool:
+        """Record a /start from a non-member.
+
+        Returns False when the same user already asked within the cooldown.
+        """
+        now = time.time() if now is None else now
+        request = self._pending.get(uid)
+        if request is not None:
+            if now - request.last_seen < JOIN_COOLDOWN_MINUTES * 60:
+                return False
+            request.name = name
+            request.last_seen = now
+            request.attempts += 1
+        else:
+            self._pending[uid] = JoinRequest(uid, name, now, now)
+        self._dirty = True
+        self._ensure_running(bot)
+        return True
+
+    def resolve(self, uid: int) -> JoinRequest | None:
+        """Drop an accepted or rejected request; the digest is refreshed next."""
+        request = self._pending.pop(uid, None)
+        self._dirty = True
+        return request
+
+    def expire(self, now: float | None = None) -> list[JoinRequest]:
+        now = time.time() if now is None else now
+        ttl = JOIN_REQUEST_TTL_HOURS * 3600
+        stale = [r for r in self._pending.values() if now - r.last_seen >= ttl]
+        for request in stale:
+            del self._pending[request.uid]
+        if stale:
+            self._dirty = True
+        return stale
+
+    def render(self) -> tuple[str, InlineKeyboardMarkup | None]:
+        if not self._pending:
+            return "📭 Необработанных заявок на подключение нет.", None
+        requests = sorted(self._pending.values(), key=lambda r: r.first_seen)
+        lines = [f"⚠️ <b>Заявки на подключение: {len(requests)}</b>", ""]
+        rows: list[list[InlineKeyboardButton]] = []
+        for request in requests[:MAX_LISTED]:
+            name = html.escape(request.name)
+            repeat = f" ×{request.attempts}" if request.attempts > 1 else ""
+            since = time.strftime("%d.%m %H:%M", time.localtime(request.first_seen))
+            lines.append(
+                f"• <a href='tg://user?id={request.uid}'>{name}</a> "
+                f"(<code>{request.uid}</code>), с {since}{repeat}"
+            )
+            rows.append(
+                [
+                    InlineKeyboardButton(
+                        text=f"✅ {request.name}", callback_data=f"join_ok:{request.uid}"
+                    ),
+                    InlineKeyboardButton(text="❌", callback_data=f"join_no:{request.uid}"),
+                ]
+            )
+        if len(requests) > MAX_LISTED:
+            lines.append(f"…и ещё {len(requests) - MAX_LISTED}, появятся после разбора этих.")
+        return "\n".join(lines), InlineKeyboardMarkup(inline_keyboard=rows)
+
+    async def publish(self, bot: Bot) -> None:
+        """Bring the digest message up to date with the pending table."""
+        self._dirty = False
+        text, kb = self.render()
+        if self._message_id is not None:
+            try:
+                await sender.edit_message_text(
+                    bot, text, chat_id=ADMIN_ID, message_id=self._message_id, reply_markup=kb
+                )
+            except TelegramBadRequest as exc:
+                if "not modified" in exc.message:
+                    return
+                # Deleted by the admin or too old to edit — post a new one.
+                self._message_id = None
+            else:
+                if not self._pending:
+                    self._message_id = None
+                return
+        if not self._pending:
+            return
+        message = await sender.send_message(bot, ADMIN_ID, text, reply_markup=kb)
+        self._message_id = message.message_id
+
+    def _ensure_running(self, bot: Bot) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(bot))
+
+    async def _run(self, bot: Bot) -> None:
+        while self._pending or self._dirty:
+            await asyncio.sleep(JOIN_DIGEST_SECONDS)
+            self.expire()
+            if not self._dirty:
+                continue
+            try:
+                await self.publish(bot)
+            except sender.DeliveryUnavailable:
+                self._dirty = True
+                log.warning("Bot API unavailable, join digest not updated")
+            except TelegramAPIError:
+                log.exception("Could not update the join digest")
+
+
+digest = JoinDigest()
@@ -21,6 +21,7 @@ ADMIN_KB = ReplyKeyboardMarkup(
         [KeyboardButton(text="👥 Напомнить участнику")],
         [KeyboardButton(text="📣 Объявление")],
         [KeyboardButton(text="✉️ Написать участнику")],
+        [KeyboardButton(text="📦 Раздать конфиг")],
         [KeyboardButton(text="📋 Участники")],
         [KeyboardButton(text="🗑 Удалить участника")],
         [KeyboardButton(text="➕ Добавить участника")],
@@ -48,32 +49,36 @@ REMINDER_KB = InlineKeyboardMarkup(
 )
 
 
-def info_list_kb() -> InlineKeyboardMarkup:
+# Member pickers list at most this many buttons; the rest are reached by search.
+PICKER_LIMIT = 30
+
+
+def member_picker_kb(rows: list[list[InlineKeyboardButton]], action: str) -> InlineKeyboardMarkup:
+    """A member picker with a search button on top.
+
+    ``action`` is the callback prefix of the picker's buttons; search results
+    reuse it, so picking a found member works exactly like picking from the list.
+    """
+    if not rows:
+        return InlineKeyboardMarkup(
+            inline_keyboard=[[InlineKeyboardButton(text="(пусто)", callback_data="noop")]]
+        )
+    label = "🔍 Найти по имени"
+    if len(rows) > PICKER_LIMIT:
+        label = f"🔍 Найти (показаны {PICKER_LIMIT} из {len(rows)})"
+    search = [InlineKeyboardButton(text=label, callback_data=f"search:{action}")]
+    return InlineKeyboardMarkup(inline_keyboard=[search, *rows[:PICKER_LIMIT]])
+
+
+def info_list_kb(pages: list[tuple[str, str]]) -> InlineKeyboardMarkup:
+    """One button per instruction page, ``(key, title)`` in display order."""
     return InlineKeyboardMarkup(
         inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="🟣 Amnezia • X-Ray • Астана ⭐",
-                    callback_data="info:amnezia_xray_kz",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="🔵 3X-UI • X-Ray • Астана",
-                    callback_data="info:xray_kz",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text="🟣 Amnezia • AmneziaWG • Германия",
-                    callback_data="info:wg_de",
-                )
-            ],
+            [InlineKeyboardButton(text=title, callback_data=f"info:{key}")] for key, title in pages
         ]
     )
 
 
-def info_back_kb() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[[InlineKeyboardButton(text="← Назад к списку", callback_data="info:list")]]
-    )
+INFO_BACK_KB = InlineKeyboardMarkup(
+    inline_keyboard=[[InlineKeyboardButton(text="← Назад к списку", callback_data="info:list")]]
+)
@@ -3,10 +3,28 @@ import logging
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
 from aiogram.enums.parse_mode import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from app.config import ADMIN_ID, BILLING_DAY, BOT_TOKEN
+from app import billing, health, instructions, search, storage
+from app.config import (
+    ADMIN_ID,
+    BILLING_DAY,
+    BOT_API_LOCAL_MODE,
+    BOT_API_URL,
+    BOT_TOKEN,
+    HEALTH_HOST,
+    HEALTH_PORT,
+    HTTP_KEEPALIVE,
+    HTTP_POOL_LIMIT,
+    HTTP_TIMEOUT,
+    INSTRUCTIONS_WATCH_SECONDS,
+    LOOP_LAG_FAIL_SECONDS,
+    LOOP_LAG_WARN_SECONDS,
+    STATE_WATCH_SECONDS,
+)
 from app.handlers import build_router
 from app.scheduler import setup_scheduler
 
@@ -18,19 +36,60 @@ def _configure_logging() -> None:
     )
 
 
+def build_session(
+    *,
+    api_url: str = BOT_API_URL,
+    limit: int = HTTP_POOL_LIMIT,
+    keepalive: float = HTTP_KEEPALIVE,
+    timeout: float = HTTP_TIMEOUT,
+) -> AiohttpSession:
+    """One shared, pooled HTTP session for every Bot API call.
+
+    Connections stay warm between sends, so a large reminder run pays the TLS
+    handshake once per pooled connection instead of once per burst.
+    """
+    api = (
+        TelegramAPIServer.from_base(api_url, is_local=BOT_API_LOCAL_MODE)
+        if api_url
+        else PRODUCTION
+    )
+    session = AiohttpSession(api=api, limit=limit, timeout=timeout)
+    # aiogram has no public knob for the connector's keep-alive.
+    session._connector_init["keepalive_timeout"] = keepalive
+    return session
+
+
 async def main() -> None:
     _configure_logging()
 
     if not BOT_TOKEN:
         raise RuntimeError("BOT_TOKEN is not set in env")
 
-    bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    bot = Bot(
+        BOT_TOKEN,
+        session=build_session(),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+    storage.init()
+
     dp = Dispatcher(storage=MemoryStorage())
+    dp.update.outer_middleware(health.monitor.track_update)
+    dp.startup.register(health.monitor.mark_ready)
     dp.include_router(build_router())
 
-    setup_scheduler(bot, BILLING_DAY, ADMIN_ID)
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    await setup_scheduler(bot, BILLING_DAY, ADMIN_ID)
+    billing.queue.start(bot, ADMIN_ID)
+    search.index.start(ADMIN_ID)
+    storage.start_watcher(STATE_WATCH_SECONDS)
+    instructions.start_watcher(INSTRUCTIONS_WATCH_SECONDS)
+    health.monitor.start(LOOP_LAG_WARN_SECONDS, LOOP_LAG_FAIL_SECONDS)
+    health_server = await health.monitor.serve(HEALTH_HOST, HEALTH_PORT) if HEALTH_PORT else None
+    try:
+        await bot.delete_webhook(drop_pending_updates=True)
+        await dp.start_polling(bot)
+    finally:
+        if health_server is not None:
+            await health_server.cleanup()
 
 
 if __name__ == "__main__":
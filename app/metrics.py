@@ -0,0 +1,44 @@
+"""In-process counters and gauges shown to the admin by ``/metrics``.
+
+Counters are plain named integers that only go up; gauges hold the latest
+value of a measurement (event-loop lag, a job's duration). Names are dotted,
+``<area>.<what>``, so the report groups them by area. They live in memory
+and start from zero on every restart.
+"""
+
+import time
+from collections import Counter
+
+_counters: Counter[str] = Counter()
+_gauges: dict[str, float] = {}
+_started = time.monotonic()
+
+
+def incr(name: str, value: int = 1) -> None:
+    _counters[name] += value
+
+
+def gauge(name: str, value: float) -> None:
+    _gauges[name] = value
+
+
+def snapshot() -> dict[str, float]:
+    return {**_counters, **_gauges}
+
+
+def render() -> str:
+    """Counters as an HTML report for the admin chat."""
+    uptime = int(time.monotonic() - _started)
+    hours, rest = divmod(uptime, 3600)
+    lines = [f"📈 <b>Метрики</b> (аптайм {hours} ч {rest // 60} мин)"]
+    area = None
+    for name, value in sorted(snapshot().items()):
+        prefix = name.split(".", 1)[0]
+        if prefix != area:
+            area = prefix
+            lines.append("")
+        lines.append(f"<code>{name}</code>: {value}")
+    if not _counters and not _gauges:
+        lines.append("")
+        lines.append("Пока ничего не накоплено.")
+    return "\n".join(lines)
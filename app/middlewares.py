@@ -0,0 +1,186 @@
+"""Dispatcher middlewares."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from app import metrics
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated", "warned")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        # Whether the user was already told they are being throttled.
+        self.warned = False
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Per-user token bucket in front of the handlers.
+
+    Each user gets ``burst`` updates at once, refilled at ``rate`` per second.
+    An update arriving without a token waits for one if that takes at most
+    ``max_delay`` seconds, otherwise it is dropped before any handler (and
+    so storage or an outgoing message) sees it. The first drop of a flood is
+    acknowledged once, so the user knows why the bot went quiet.
+
+    Register one instance per event type as an inner middleware, so only
+    updates that actually matched a handler spend tokens. ``exempt`` users
+    (the admin) are never throttled. Counters go to :mod:`app.metrics` as
+    ``throttle.<kind>.passed|delayed|dropped``.
+    """
+
+    # Idle buckets are forgotten once the table grows past this size.
+    MAX_BUCKETS = 10_000
+
+    def __init__(
+        self,
+        kind: str,
+        *,
+        rate: float,
+        burst: int,
+        max_delay: float,
+        exempt: frozenset[int] = frozenset(),
+    ) -> None:
+        self.kind = kind
+        self.rate = rate
+        self.burst = burst
+        self.max_delay = max_delay
+        self.exempt = exempt
+        self._buckets: dict[int, TokenBucket] = {}
+
+    def _bucket(self, uid: int, now: float) -> TokenBucket:
+        bucket = self._buckets.get(uid)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_BUCKETS:
+                self._forget_idle(now)
+            bucket = self._buckets[uid] = TokenBucket(self.burst, now)
+            return bucket
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+        return bucket
+
+    def _forget_idle(self, now: float) -> None:
+        full_after = self.burst / self.rate
+        self._buckets = {
+            uid: bucket
+            for uid, bucket in self._buckets.items()
+            if now - bucket.updated < full_after
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None or user.id in self.exempt:
+            return await handler(event, data)
+
+        bucket = self._bucket(user.id, time.monotonic())
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            bucket.warned = False
+            metrics.incr(f"throttle.{self.kind}.passed")
+            return await handler(event, data)
+
+        wait = (1 - bucket.tokens) / self.rate
+        if wait <= self.max_delay:
+            # Reserve the token now so concurrent updates queue up behind it.
+            bucket.tokens -= 1
+            metrics.incr(f"throttle.{self.kind}.delayed")
+            await asyncio.sleep(wait)
+            return await handler(event, data)
+
+        metrics.incr(f"throttle.{self.kind}.dropped")
+        if not bucket.warned:
+            bucket.warned = True
+            await self._warn(event)
+        elif isinstance(event, CallbackQuery):
+            # Still stop the button's loading spinner.
+            await event.answer()
+        return None
+
+    @staticmethod
+    async def _warn(event: TelegramObject) -> None:
+        text = "⏳ Слишком много запросов. Подождите немного и попробуйте снова."
+        if isinstance(event, CallbackQuery):
+            await event.answer(text, show_alert=True)
+        elif isinstance(event, Message):
+            await event.answer(text)
+
+
+# (user id, message id or inline message id, callback data)
+_TapKey = tuple[int, int | str | None, str | None]
+
+
+class IdempotencyMiddleware(BaseMiddleware):
+    """Drops repeated taps on buttons whose handler must run only once.
+
+    Handlers opt in with ``flags={"idempotent": True}``. A tap is keyed by
+    (user, message, callback data). While the first tap is being handled and
+    for ``ttl`` seconds after, the same key is answered (so the button stops
+    spinning) and dropped before the handler, so a double tap costs no
+    storage write and no Bot API call. If the handler raises, or calls the
+    ``release_tap()`` it receives (after asking the user to press again),
+    the key is released and the tap can be retried. Dropped taps are counted
+    as ``idempotency.duplicate``.
+
+    Register it as an inner middleware on callback queries, before throttling.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        # Keys whose handler is still running -> whether to remember the key
+        # once it finishes (False after the handler called ``release_tap``).
+        self._running: dict[_TapKey, bool] = {}
+        # Finished key -> monotonic time it expires, in expiry order.
+        self._seen: OrderedDict[_TapKey, float] = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        while self._seen:
+            key, until = next(iter(self._seen.items()))
+            if until > now:
+                break
+            del self._seen[key]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, CallbackQuery) or not get_flag(data, "idempotent"):
+            return await handler(event, data)
+
+        message_id = event.message.message_id if event.message else event.inline_message_id
+        key = (event.from_user.id, message_id, event.data)
+        now = time.monotonic()
+        self._expire(now)
+        if key in self._running or self._seen.get(key, 0) > now:
+            metrics.incr("idempotency.duplicate")
+            await event.answer()
+            return None
+
+        def release_tap() -> None:
+            self._running[key] = False
+
+        self._running[key] = True
+        data["release_tap"] = release_tap
+        try:
+            result = await handler(event, data)
+        finally:
+            remember = self._running.pop(key)
+        if remember:
+            self._seen.pop(key, None)
+            self._seen[key] = time.monotonic() + self.ttl
+        return result
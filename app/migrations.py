@@ -0,0 +1,104 @@
+"""Versioned schema of the state file.
+
+The file carries a ``schema_version`` (files written before it existed count
+as version 0). Each migration upgrades the raw state from ``version - 1`` to
+``version`` in place; :func:`upgrade` applies the pending ones in order.
+Storage runs this once at startup (:func:`app.storage.init`) and when a
+snapshot is restored, so regular loads never have to fix anything up.
+
+To change the layout: bump ``models.SCHEMA_VERSION``, register a migration
+for the new version here and update the models.
+"""
+
+import logging
+from collections.abc import Callable
+from datetime import datetime
+
+from app import stats
+from app.config import DEFAULT_PAYMENT_INFO, DEFAULT_PRICE
+from app.models import SCHEMA_VERSION, Settings, State
+
+log = logging.getLogger(__name__)
+
+MIGRATIONS: dict[int, Callable[[dict], None]] = {}
+
+
+def migration(version: int) -> Callable[[Callable[[dict], None]], Callable[[dict], None]]:
+    """Register ``func`` as the upgrade from ``version - 1`` to ``version``."""
+
+    def register(func: Callable[[dict], None]) -> Callable[[dict], None]:
+        if version in MIGRATIONS:
+            raise RuntimeError(f"duplicate migration for schema version {version}")
+        MIGRATIONS[version] = func
+        return func
+
+    return register
+
+
+def schema_version(raw: dict) -> int:
+    return raw.get("schema_version", 0)
+
+
+def upgrade(raw: dict) -> bool:
+    """Bring ``raw`` up to ``SCHEMA_VERSION`` in place.
+
+    Returns True when anything was migrated. Raises ValueError for a state
+    written by a newer version of the bot — it must not be downgraded silently.
+    """
+    current = schema_version(raw)
+    if current > SCHEMA_VERSION:
+        raise ValueError(
+            f"state schema version {current} is newer than supported {SCHEMA_VERSION}"
+        )
+    for version in range(current + 1, SCHEMA_VERSION + 1):
+        func = MIGRATIONS.get(version)
+        if func is None:
+            raise RuntimeError(f"no migration registered for schema version {version}")
+        func(raw)
+        raw["schema_version"] = version
+        log.info("State migrated to schema version %d (%s)", version, func.__name__)
+    return current != SCHEMA_VERSION
+
+
+@migration(1)
+def add_missing_sections(raw: dict) -> None:
+    """Files from early versions may lack whole sections or settings keys."""
+    raw.setdefault("users", {})
+    raw.setdefault("payments", {})
+    settings = raw.setdefault("settings", {})
+    settings.setdefault("price", DEFAULT_PRICE)
+    settings.setdefault("payment_info", DEFAULT_PAYMENT_INFO)
+
+
+@migration(2)
+def add_payment_stats(raw: dict) -> None:
+    """Payment statistics are maintained on write from now on; seed them."""
+    state = State.from_dict(raw, Settings(DEFAULT_PRICE, DEFAULT_PAYMENT_INFO))
+    raw["stats"] = stats.rebuild(state).to_dict()
+
+
+@migration(3)
+def add_payment_timelines(raw: dict) -> None:
+    """Per-member payment timelines, seeded from payments and late lists."""
+    month_stats = raw["stats"]["months"]
+    for uid, personal in raw["stats"]["per_member"].items():
+        months = sorted(month for month, paid in raw["payments"].items() if uid in paid)
+        personal["months"] = {
+            month: int(uid) in month_stats.get(month, {}).get("late", ()) for month in months
+        }
+        personal["since"] = months[0] if months else None
+
+
+@migration(4)
+def fill_member_since(raw: dict) -> None:
+    """``since`` is the month a member joined, which older files never stored.
+
+    Version 3 left it empty for members who had never paid. The earliest
+    paid month is the best known bound; a member with no payments is known
+    to be on the books from now on.
+    """
+    now = stats.month_key(datetime.now())
+    for personal in raw["stats"]["per_member"].values():
+        first_paid = min(personal["months"], default=None)
+        known = [month for month in (personal["since"], first_paid) if month]
+        personal["since"] = min(known, default=now)
@@ -0,0 +1,231 @@
+"""Typed in-memory model of the bot state.
+
+The state file keeps its JSON-friendly layout (string chat ids, payments as
+``{month: {uid: true}}``); everything in the process works with these slotted
+dataclasses keyed by ``int`` chat id, with payments held as ``set[int]`` per
+month. Conversion happens only in :mod:`app.storage` when reading and writing
+the file.
+"""
+
+from dataclasses import dataclass, field
+
+# Layout version of the state file, see app/migrations.py.
+SCHEMA_VERSION = 4
+
+# After this many failed sends in a row a chat is treated as dead and skipped
+# by fan-out paths until the member shows up again (e.g. presses /start).
+MAX_DELIVERY_FAILURES = 3
+
+
+@dataclass(slots=True)
+class Member:
+    id: int
+    name: str
+    username: str | None = None
+    role: str = "member"
+    billing_day: int | None = None
+    # Delivery health, see storage.record_delivery().
+    last_ok: str | None = None
+    failures: int = 0
+    blocked: bool = False
+
+    @property
+    def reachable(self) -> bool:
+        """Whether fan-out paths should still try to message this user."""
+        return not self.blocked and self.failures < MAX_DELIVERY_FAILURES
+
+    @classmethod
+    def from_dict(cls, uid: str, raw: dict) -> "Member":
+        delivery = raw.get("delivery") or {}
+        return cls(
+            id=int(uid),
+            name=raw["name"],
+            username=raw.get("username"),
+            role=raw.get("role", "member"),
+            billing_day=raw.get("billing_day"),
+            last_ok=delivery.get("last_ok"),
+            failures=delivery.get("failures", 0),
+            blocked=delivery.get("blocked", False),
+        )
+
+    def to_dict(self) -> dict:
+        raw: dict = {"name": self.name, "username": self.username, "role": self.role}
+        if self.billing_day is not None:
+            raw["billing_day"] = self.billing_day
+        if self.last_ok is not None or self.failures or self.blocked:
+            raw["delivery"] = {
+                "last_ok": self.last_ok,
+                "failures": self.failures,
+                "blocked": self.blocked,
+            }
+        return raw
+
+
+@dataclass(slots=True)
+class Settings:
+    price: str
+    payment_info: str
+
+    @classmethod
+    def from_dict(cls, raw: dict, defaults: "Settings") -> "Settings":
+        return cls(
+            price=raw.get("price", defaults.price),
+            payment_info=raw.get("payment_info", defaults.payment_info),
+        )
+
+    def to_dict(self) -> dict:
+        return {"price": self.price, "payment_info": self.payment_info}
+
+
+@dataclass(slots=True)
+class MonthStats:
+    # Members on the books, as of the last membership change in the month.
+    members: int = 0
+    # Members who paid for the month, and those of them who paid late.
+    paid: int = 0
+    late: set[int] = field(default_factory=set)
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "MonthStats":
+        return cls(
+            members=raw.get("members", 0),
+            paid=raw.get("paid", 0),
+            late={int(uid) for uid in raw.get("late", ())},
+        )
+
+    def to_dict(self) -> dict:
+        return {"members": self.members, "paid": self.paid, "late": sorted(self.late)}
+
+
+@dataclass(slots=True)
+class MemberStats:
+    # Months paid on time in a row, ending at ``last_paid``.
+    streak: int = 0
+    best_streak: int = 0
+    # Payments made after the member's due day, all time.
+    late: int = 0
+    last_paid: str | None = None
+    # First month the member was on the books.
+    since: str | None = None
+    # The member's own payment timeline: paid month -> whether it was late.
+    months: dict[str, bool] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "MemberStats":
+        return cls(
+            streak=raw.get("streak", 0),
+            best_streak=raw.get("best_streak", 0),
+            late=raw.get("late", 0),
+            last_paid=raw.get("last_paid"),
+            since=raw.get("since"),
+            months=dict(raw.get("months", {})),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "streak": self.streak,
+            "best_streak": self.best_streak,
+            "late": self.late,
+            "last_paid": self.last_paid,
+            "since": self.since,
+            "months": dict(sorted(self.months.items())),
+        }
+
+
+@dataclass(slots=True)
+class Stats:
+    """Payment aggregates kept up to date on every write, see app/stats.py."""
+
+    members: int = 0
+    months: dict[str, MonthStats] = field(default_factory=dict)
+    per_member: dict[int, MemberStats] = field(default_factory=dict)
+    # Rankings for /stats, derived from ``per_member`` and not stored. Both
+    # are sorted ascending: ``(late, uid)`` of members with late payments,
+    # and ``(streak, uid)`` of runs over one month, keyed by ``last_paid``.
+    late_ranking: list[tuple[int, int]] = field(default_factory=list)
+    streak_rankings: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "Stats":
+        stats = cls(
+            members=raw.get("members", 0),
+            months={month: MonthStats.from_dict(m) for month, m in raw.get("months", {}).items()},
+            per_member={
+                int(uid): MemberStats.from_dict(m)
+                for uid, m in raw.get("per_member", {}).items()
+            },
+        )
+        for uid, personal in stats.per_member.items():
+            if personal.late:
+                stats.late_ranking.append((personal.late, uid))
+            if personal.streak > 1:
+                stats.streak_rankings.setdefault(personal.last_paid, []).append(
+                    (personal.streak, uid)
+                )
+        stats.late_ranking.sort()
+        for ranking in stats.streak_rankings.values():
+            ranking.sort()
+        return stats
+
+    def to_dict(self) -> dict:
+        return {
+            "members": self.members,
+            "months": {month: m.to_dict() for month, m in sorted(self.months.items())},
+            "per_member": {str(uid): m.to_dict() for uid, m in self.per_member.items()},
+        }
+
+
+@dataclass(slots=True)
+class State:
+    users: dict[int, Member] = field(default_factory=dict)
+    payments: dict[str, set[int]] = field(default_factory=dict)
+    settings: Settings = field(default_factory=lambda: Settings("0", "—"))
+    # Last completed run of each scheduled job, ISO timestamps.
+    jobs: dict[str, str] = field(default_factory=dict)
+    stats: Stats = field(default_factory=Stats)
+    # Telegram file_id of every document the bot has sent, by "<sha256>/<file name>".
+    files: dict[str, str] = field(default_factory=dict)
+    # Members the scheduled reminders (the monthly run and personal billing
+    # days) already reached, by month (only the latest month is kept), so a
+    # replay after a restart does not remind them twice.
+    reminded: dict[str, set[int]] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: dict, default_settings: Settings) -> "State":
+        return cls(
+            users={
+                int(uid): Member.from_dict(uid, info)
+                for uid, info in raw.get("users", {}).items()
+            },
+            payments={
+                month: {int(uid) for uid in paid}
+                for month, paid in raw.get("payments", {}).items()
+            },
+            settings=Settings.from_dict(raw.get("settings", {}), default_settings),
+            jobs=dict(raw.get("jobs", {})),
+            stats=Stats.from_dict(raw.get("stats", {})),
+            files=dict(raw.get("files", {})),
+            reminded={
+                month: {int(uid) for uid in uids}
+                for month, uids in raw.get("reminded", {}).items()
+            },
+        )
+
+    def to_dict(self) -> dict:
+        raw = {
+            "schema_version": SCHEMA_VERSION,
+            "users": {str(uid): member.to_dict() for uid, member in self.users.items()},
+            "payments": {
+                month: {str(uid): True for uid in sorted(paid)}
+                for month, paid in self.payments.items()
+            },
+            "settings": self.settings.to_dict(),
+            "stats": self.stats.to_dict(),
+        }
+        if self.jobs:
+            raw["jobs"] = self.jobs
+        if self.files:
+            raw["files"] = self.files
+        if self.reminded:
+            raw["reminded"] = {month: sorted(uids) for month, uids in self.reminded.items()}
+        return raw
@@ -0,0 +1,119 @@
+"""Admin notifications about member payments, batched into one message.
+
+Payments reported with "Оплачено ✅" or ``/paid`` are buffered for
+``PAID_NOTIFY_SECONDS`` and then merged into the day's digest message:
+a running list of who paid today plus the month's paid/total counter. The
+first flush of a day sends a new message, so the admin gets a notification.
+Later flushes that day edit it in place, so a billing-day burst costs a
+handful of edits instead of one message per member.
+
+Events that need the admin's attention right away (see :meth:`urgent`)
+bypass the buffer.
+"""
+
+import asyncio
+import html
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+
+from app import sender, storage
+from app.config import ADMIN_ID, PAID_NOTIFY_SECONDS
+
+log = logging.getLogger(__name__)
+
+# Keeps the message well under Telegram's 4096 characters.
+MAX_LISTED = 50
+
+
+@dataclass(slots=True)
+class _DayDigest:
+    day: date
+    month: str
+    names: list[str] = field(default_factory=list)
+    message_id: int | None = None
+
+
+class PaymentDigest:
+    def __init__(self) -> None:
+        self._current: _DayDigest | None = None
+        self._buffer: list[tuple[str, str]] = []
+        # The day's message lags behind its list (a flush failed).
+        self._stale = False
+        self._task: asyncio.Task | None = None
+
+    def add(self, bot: Bot, full_name: str, month: str) -> None:
+        """Buffer a payment; it shows up in the digest within the window."""
+        self._buffer.append((full_name, month))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later(bot))
+
+    async def urgent(self, bot: Bot, text: str) -> None:
+        """Send ``text`` to the admin immediately, outside the digest."""
+        try:
+            await sender.send_message(bot, ADMIN_ID, text, interactive=True)
+        except sender.DeliveryUnavailable:
+            log.warning("Could not send urgent payment notice to admin: %s", text)
+
+    def render(self, current: _DayDigest) -> str:
+        unpaid = len(storage.unpaid(current.month, ADMIN_ID))
+        total = len(storage.list_members(ADMIN_ID))
+        lines = [
+            f"💳 <b>Оплаты за {current.month}</b>: {total - unpaid}/{total}",
+            "",
+            f"Сегодня, {current.day:%d.%m}:",
+        ]
+        lines.extend(f"• {html.escape(name)}" for name in current.names[-MAX_LISTED:])
+        if len(current.names) > MAX_LISTED:
+            lines.insert(3, f"…и ещё {len(current.names) - MAX_LISTED} раньше")
+        return "\n".join(lines)
+
+    async def flush(self, bot: Bot) -> None:
+        if not self._buffer and not self._stale:
+            return
+        buffered, self._buffer = self._buffer, []
+        if buffered:
+            today, month = date.today(), buffered[-1][1]
+            current = self._current
+            if current is None or current.day != today or current.month != month:
+                self._current = _DayDigest(today, month)
+            self._current.names.extend(name for name, _ in buffered)
+        current = self._current
+        self._stale = True
+
+        text = self.render(current)
+        if current.message_id is not None:
+            try:
+                await sender.edit_message_text(
+                    bot, text, chat_id=ADMIN_ID, message_id=current.message_id
+                )
+                self._stale = False
+                return
+            except TelegramBadRequest as exc:
+                if "not modified" in exc.message:
+                    self._stale = False
+                    return
+                # Deleted by the admin — start a fresh message.
+                current.message_id = None
+        message = await sender.send_message(bot, ADMIN_ID, text)
+        current.message_id = message.message_id
+        self._stale = False
+
+    async def _flush_later(self, bot: Bot) -> None:
+        # Payments buffered while a flush was sending go out with the next one.
+        while self._buffer or self._stale:
+            await asyncio.sleep(PAID_NOTIFY_SECONDS)
+            try:
+                await self.flush(bot)
+            except sender.DeliveryUnavailable:
+                # The digest stays stale, so the loop retries it.
+                log.warning("Bot API unavailable, payment digest postponed")
+            except TelegramAPIError:
+                self._stale = False
+                log.exception("Could not update the payment digest")
+
+
+digest = PaymentDigest()
@@ -1,21 +1,141 @@
-from datetime import datetime
+import asyncio
+import logging
+import time
+import zlib
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 
 from aiogram import Bot
-from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from app import health, sender, snapshots
+from app.config import (
+    MISSED_JOB_GRACE_HOURS,
+    REMINDER_BATCH_SECONDS,
+    REMINDER_WINDOW_MINUTES,
+    REMINDER_WINDOW_START,
+)
 from app.keyboards import REMINDER_KB
-from app.storage import list_members, unpaid
+from app.storage import (
+    DELIVERY_BLOCKED,
+    DELIVERY_FAILED,
+    DELIVERY_OK,
+    get_job_last_run,
+    get_reminded,
+    list_members,
+    mark_reminded,
+    record_delivery,
+    set_job_last_run,
+    unpaid,
+)
 from app.texts import build_reminder_text
 
+log = logging.getLogger(__name__)
 
-async def remind_members(bot: Bot, admin_id: int) -> None:
+TZ = ZoneInfo("Europe/Moscow")
+
+# How far back a missed scheduled run is still replayed on startup.
+MISSED_JOB_GRACE = timedelta(hours=MISSED_JOB_GRACE_HOURS)
+
+
+def dispatch_offset(uid: int, window: float) -> float:
+    """Deterministic position of a member inside the dispatch window, in seconds.
+
+    Hash-based rather than random so a member gets the reminder at the same
+    time every month and reruns do not reshuffle the order.
+    """
+    if window <= 0:
+        return 0.0
+    return zlib.crc32(str(uid).encode()) % int(window * 1000) / 1000
+
+
+async def dispatch_batches(
+    uids: list[int], window: float, batch_seconds: float
+) -> AsyncIterator[list[int]]:
+    """Spread ``uids`` over ``window`` seconds and yield them batch by batch.
+
+    Members are bucketed into ``batch_seconds``-wide slots by
+    :func:`dispatch_offset`; each slot is yielded when its time comes. With a
+    zero window everything is yielded at once.
+    """
+    slots: dict[int, list[int]] = {}
+    for uid in uids:
+        slot = int(dispatch_offset(uid, window) // batch_seconds) if window > 0 else 0
+        slots.setdefault(slot, []).append(uid)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for slot in sorted(slots):
+        delay = started + slot * batch_seconds - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield slots[slot]
+
+
+async def remind_members(
+    bot: Bot,
+    admin_id: int,
+    window: float = 0.0,
+    batch_seconds: float = REMINDER_BATCH_SECONDS,
+    resume: bool = False,
+) -> bool:
+    """Send the payment reminder to every unpaid, reachable member.
+
+    Members with a personal billing day are left to :mod:`app.billing`.
+    ``window`` (seconds) spreads the sends instead of firing them all at once;
+    the scheduled run uses the configured dispatch window, manual runs from the
+    admin menu go out immediately. With ``resume`` the members reached are
+    recorded and members already reached this month are skipped, so a replay
+    of an interrupted run only sends what is left.
+
+    Returns False if the run was cut short because the Bot API is unavailable.
+    """
     month = datetime.now().strftime("%Y-%m")
-    for uid in unpaid(month, admin_id):
-        try:
-            await bot.send_message(uid, build_reminder_text(), reply_markup=REMINDER_KB)
-        except TelegramBadRequest:
-            continue
+    members = list_members(admin_id)
+    done = get_reminded(month) if resume else set()
+    debtors = [
+        uid
+        for uid in unpaid(month, admin_id)
+        if not members[uid].billing_day and uid not in done
+    ]
+    async for batch in dispatch_batches(debtors, window, batch_seconds):
+        # Re-read state per batch: members who paid while the window is open
+        # must not get the reminder anyway.
+        members = list_members(admin_id)
+        still_unpaid = set(unpaid(month, admin_id))
+        text = build_reminder_text()
+        outcomes: dict[int, str] = {}
+        interrupted = False
+        for uid in batch:
+            member = members.get(uid)
+            if uid not in still_unpaid or member is None or not member.reachable:
+                continue
+            try:
+                await sender.send_message(bot, uid, text, reply_markup=REMINDER_KB)
+                outcomes[uid] = DELIVERY_OK
+            except TelegramForbiddenError:
+                outcomes[uid] = DELIVERY_BLOCKED
+            except TelegramBadRequest:
+                outcomes[uid] = DELIVERY_FAILED
+            except sender.DeliveryUnavailable:
+                log.warning("Bot API unavailable, reminders for %s interrupted", month)
+                interrupted = True
+                break
+        await record_delivery(outcomes)
+        if resume:
+            await mark_reminded(
+                month, [uid for uid, outcome in outcomes.items() if outcome == DELIVERY_OK]
+            )
+        if interrupted:
+            return False
+    return True
+
+
+async def scheduled_reminder(bot: Bot, admin_id: int, window: float) -> bool:
+    """The monthly run: spread over ``window`` and resumable after a restart."""
+    return await remind_members(bot, admin_id, window, resume=True)
 
 
 async def admin_summary(bot: Bot, admin_id: int) -> None:
@@ -28,7 +148,7 @@ async def admin_summary(bot: Bot, admin_id: int) -> None:
     rows = [
         [
             InlineKeyboardButton(
-                text=f"Пнуть 🚀 {members[str(uid)]['name']}",
+                text=f"Пнуть 🚀 {members[uid].name}",
                 callback_data=f"ping:{uid}",
             )
         ]
@@ -37,7 +157,8 @@ async def admin_summary(bot: Bot, admin_id: int) -> None:
 
     kb = InlineKeyboardMarkup(inline_keyboard=rows) if rows else None
 
-    await bot.send_message(
+    await sender.send_message(
+        bot,
         admin_id,
         f"<b>Отчёт об оплате за {month}</b>\n"
         f"{bar}  {paid_cnt}/{len(members)} участников оплатили.",
@@ -45,26 +166,91 @@ async def admin_summary(bot: Bot, admin_id: int) -> None:
     )
 
 
-def setup_scheduler(bot: Bot, billing_day: int, admin_id: int) -> None:
+def _previous_fire(day: int, hour: int, minute: int, now: datetime) -> datetime:
+    """Most recent moment a monthly cron at ``day hour:minute`` should have fired."""
+    fire = now.replace(day=day, hour=hour, minute=minute, second=0, microsecond=0)
+    if fire > now:
+        year, month = (now.year - 1, 12) if now.month == 1 else (now.year, now.month - 1)
+        fire = fire.replace(year=year, month=month)
+    return fire
+
+
+def _tracked(
+    job_id: str, func: Callable[..., Awaitable[bool | None]]
+) -> Callable[..., Awaitable[None]]:
+    """Wrap a job so its completion time is persisted for catch-up on boot.
+
+    A job that returns False did not finish its work; its run is not recorded,
+    so the next start catches it up. The run's duration and outcome are
+    reported to :mod:`app.health`.
+    """
+
+    async def run(*args) -> None:
+        started = time.monotonic()
+        try:
+            complete = await func(*args) is not False
+        except Exception:
+            health.monitor.record_job(job_id, time.monotonic() - started, ok=False)
+            raise
+        health.monitor.record_job(job_id, time.monotonic() - started, ok=complete)
+        if complete:
+            await set_job_last_run(job_id, datetime.now(TZ))
+        else:
+            log.warning("Job %s did not complete, it will be caught up on the next start", job_id)
+
+    return run
+
+
+async def setup_scheduler(bot: Bot, billing_day: int, admin_id: int) -> None:
     from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-    sched = AsyncIOScheduler(timezone="Europe/Moscow")
-    sched.add_job(
-        remind_members,
-        "cron",
-        day=billing_day,
-        hour=12,
-        minute=0,
-        args=[bot, admin_id],
-        id="members_reminder",
-    )
-    sched.add_job(
-        admin_summary,
-        "cron",
-        day=billing_day,
-        hour=21,
-        minute=0,
-        args=[bot, admin_id],
-        id="admin_report",
-    )
+    sched = AsyncIOScheduler(timezone=TZ)
+    hour, minute = REMINDER_WINDOW_START
+    jobs = [
+        (
+            "members_reminder",
+            scheduled_reminder,
+            hour,
+            minute,
+            [bot, admin_id, REMINDER_WINDOW_MINUTES * 60],
+        ),
+        ("admin_report", admin_summary, 21, 0, [bot, admin_id]),
+    ]
+
+    now = datetime.now(TZ)
+    for job_id, func, hour, minute, args in jobs:
+        job = _tracked(job_id, func)
+        sched.add_job(
+            job,
+            "cron",
+            day=billing_day,
+            hour=hour,
+            minute=minute,
+            args=args,
+            id=job_id,
+            misfire_grace_time=3600,
+            coalesce=True,
+        )
+
+        # The job store is in memory, so a run missed while the bot was down
+        # would be lost until next month. Replay it once if it is recent.
+        fire = _previous_fire(billing_day, hour, minute, now)
+        last_run = get_job_last_run(job_id)
+        if last_run is None:
+            # Never tracked before (first start with this version): nothing
+            # is known to be missed, start tracking from now.
+            await set_job_last_run(job_id, now)
+        elif last_run < fire and now - fire <= MISSED_JOB_GRACE:
+            log.info("Job %s missed its run at %s, catching up", job_id, fire)
+            # No misfire grace: a slow startup must not make it skip the run.
+            sched.add_job(
+                job,
+                "date",
+                run_date=now,
+                args=args,
+                id=f"{job_id}_catchup",
+                misfire_grace_time=None,
+            )
+
+    sched.add_job(snapshots.take_snapshot, "interval", hours=1, id="state_snapshot")
     sched.start()
@@ -0,0 +1,182 @@
+"""In-memory search index over member names, usernames and ids.
+
+Name and username words are indexed by prefix ("сер" finds "Сергей") and by
+trigram ("гей" finds it too); ids by prefix. The words of a query are
+matched separately and intersected, so a lookup costs the size of the
+matching sets, not the member count. Adds, renames and removals update the
+index in place. :func:`match_members` resolves pasted lists of ids, names
+and usernames for the admin handlers.
+"""
+
+import heapq
+import logging
+import re
+
+from app import storage
+from app.models import Member
+
+log = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+_SEPARATORS = re.compile(r"[,;\n]+")
+
+# Prefixes longer than this are not indexed; longer query words are matched
+# by trigrams as well.
+MAX_PREFIX = 12
+
+
+def normalize(text: str) -> str:
+    return text.casefold().replace("ё", "е")
+
+
+def _normalize_entry(text: str) -> str:
+    return normalize(text).lstrip("@").strip()
+
+
+def match_members(text: str, members: dict[int, Member]) -> tuple[set[int], list[str]]:
+    """Match a pasted list of ids / names / usernames against members.
+
+    Entries are separated by commas, semicolons or new lines. An entry matches
+    by numeric id, by @username, or when every word of a member's name occurs
+    in it — so "РЫБИН СЕРГЕЙ АЛЕКСАНДРОВИЧ" from a bank statement finds
+    "Сергей Рыбин". Indexes are built once, so each entry costs a few dict
+    lookups regardless of the member count. Returns matched ids and the
+    entries that matched nobody (or more than one member).
+    """
+    by_username: dict[str, int] = {}
+    by_word: dict[str, list[int]] = {}
+    name_len: dict[int, int] = {}
+    for uid, member in members.items():
+        if member.username:
+            by_username[_normalize_entry(member.username)] = uid
+        words = set(_WORD.findall(_normalize_entry(member.name)))
+        name_len[uid] = len(words)
+        for word in words:
+            by_word.setdefault(word, []).append(uid)
+
+    matched: set[int] = set()
+    unknown: list[str] = []
+    for entry in _SEPARATORS.split(text):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if entry.isdigit():
+            if int(entry) in members:
+                matched.add(int(entry))
+            else:
+                unknown.append(entry)
+            continue
+        normalized = _normalize_entry(entry)
+        if normalized in by_username:
+            matched.add(by_username[normalized])
+            continue
+
+        hits: dict[int, int] = {}
+        for word in set(_WORD.findall(normalized)):
+            for uid in by_word.get(word, ()):
+                hits[uid] = hits.get(uid, 0) + 1
+        found = [uid for uid, count in hits.items() if count == name_len[uid]]
+        if len(found) == 1:
+            matched.add(found[0])
+        else:
+            unknown.append(entry)
+    return matched, unknown
+
+
+def _trigrams(word: str) -> set[str]:
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+class MemberIndex:
+    def __init__(self) -> None:
+        self._prefixes: dict[str, set[int]] = {}
+        self._trigrams: dict[str, set[int]] = {}
+        # uid -> (prefix keys, trigram keys) it was indexed under.
+        self._entries: dict[int, tuple[set[str], set[str]]] = {}
+        # uid -> normalized name, the ranking key among equal matches.
+        self._names: dict[int, str] = {}
+        self._admin_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, member: Member) -> None:
+        self.discard(member.id)
+        words = _WORD.findall(normalize(f"{member.name} {member.username or ''}"))
+        prefixes = {word[:length] for word in words for length in range(1, MAX_PREFIX + 1)}
+        uid = str(member.id)
+        prefixes.update(uid[:length] for length in range(1, len(uid) + 1))
+        trigrams = set().union(*(_trigrams(word) for word in words))
+        for key in prefixes:
+            self._prefixes.setdefault(key, set()).add(member.id)
+        for key in trigrams:
+            self._trigrams.setdefault(key, set()).add(member.id)
+        self._entries[member.id] = (prefixes, trigrams)
+        self._names[member.id] = normalize(member.name)
+
+    def discard(self, uid: int) -> None:
+        entry = self._entries.pop(uid, None)
+        if entry is None:
+            return
+        del self._names[uid]
+        for keys, table in zip(entry, (self._prefixes, self._trigrams)):
+            for key in keys:
+                bucket = table[key]
+                bucket.discard(uid)
+                if not bucket:
+                    del table[key]
+
+    def rebuild(self, members: dict[int, Member]) -> None:
+        self._prefixes.clear()
+        self._trigrams.clear()
+        self._entries.clear()
+        self._names.clear()
+        for member in members.values():
+            self.add(member)
+
+    def _match_word(self, word: str) -> tuple[set[int], set[int]]:
+        """Members matching ``word``: (by prefix, by prefix or trigram)."""
+        by_prefix = self._prefixes.get(word[:MAX_PREFIX], set())
+        if len(word) < 3:
+            return by_prefix, by_prefix
+        buckets = sorted(
+            (self._trigrams.get(gram, set()) for gram in _trigrams(word)), key=len
+        )
+        by_trigram = buckets[0].intersection(*buckets[1:])
+        return by_prefix, by_prefix | by_trigram
+
+    def search(self, query: str, limit: int = 10) -> list[int]:
+        """Up to ``limit`` member ids, prefix matches first, then by name."""
+        words = _WORD.findall(normalize(query))
+        if not words:
+            return []
+        found: set[int] | None = None
+        prefixed: set[int] | None = None
+        for word in words:
+            by_prefix, matched = self._match_word(word)
+            found = matched if found is None else found & matched
+            prefixed = by_prefix if prefixed is None else prefixed & by_prefix
+            if not found:
+                return []
+        return heapq.nsmallest(
+            limit, found, key=lambda uid: (uid not in prefixed, self._names[uid], uid)
+        )
+
+    def on_storage_event(self, event: str, chat_id: int) -> None:
+        if event == storage.EVENT_STATE_REPLACED:
+            self.rebuild(storage.list_members(self._admin_id))
+        elif event == storage.EVENT_USER_REMOVED:
+            self.discard(chat_id)
+        elif event in (storage.EVENT_USER_ADDED, storage.EVENT_USER_CHANGED):
+            member = storage.get_user(chat_id)
+            if member is not None and chat_id != self._admin_id:
+                self.add(member)
+
+    def start(self, admin_id: int) -> None:
+        self._admin_id = admin_id
+        self.rebuild(storage.list_members(admin_id))
+        storage.subscribe(self.on_storage_event)
+        log.info("Member search index built for %d members", len(self))
+
+
+index = MemberIndex()
@@ -0,0 +1,180 @@
+"""Single entry point for outgoing Bot API calls.
+
+Every handler and scheduled job sends through :func:`send_message` /
+:func:`edit_message_text` / :func:`send_document` instead of calling ``Bot`` directly, so flood
+control, retries and the circuit breaker behave the same everywhere.
+
+* ``TelegramRetryAfter`` is honoured by sleeping exactly as long as Telegram
+  asks.
+* Network and 5xx errors are retried with jittered exponential backoff.
+* Repeated network/5xx errors open a circuit breaker: while it is open calls
+  fail immediately with :class:`DeliveryUnavailable` instead of piling up
+  coroutines waiting on a degraded API. After a cooldown one probe call is let
+  through; its result closes or re-opens the breaker.
+
+Client errors (``TelegramBadRequest``, ``TelegramForbiddenError``) are not
+retried and are re-raised unchanged — they say something about the chat, not
+about the API.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import InputFile, Message
+
+from app import metrics
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Background jobs (reminders, broadcasts) can afford to wait; handlers that a
+# human is looking at should give up quickly.
+BACKGROUND_ATTEMPTS = 5
+INTERACTIVE_ATTEMPTS = 2
+INTERACTIVE_MAX_RETRY_AFTER = 5
+
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+
+class DeliveryUnavailable(Exception):
+    """The Bot API is degraded; the call was skipped or retries were exhausted."""
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        # Half-open: let exactly one call through to test the API.
+        self._probing = True
+        return True
+
+    def success(self) -> None:
+        if self.opened_at is not None:
+            log.info("Bot API recovered, closing circuit breaker")
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release(self) -> None:
+        """Give the probe slot back without a verdict (e.g. on cancellation)."""
+        self._probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self._probing or (self.opened_at is None and self.failures >= self.threshold):
+            log.warning("Bot API degraded, opening circuit breaker for %.0fs", self.cooldown)
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+
+
+def _backoff(attempt: int) -> float:
+    # "Full jitter": uniform in [0, min(cap, base * 2**attempt)].
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+
+
+async def _call(make_call: Callable[[], Awaitable[T]], *, interactive: bool) -> T:
+    attempts = INTERACTIVE_ATTEMPTS if interactive else BACKGROUND_ATTEMPTS
+    for attempt in range(attempts):
+        if not breaker.allow():
+            metrics.incr("sender.breaker_rejected")
+            raise DeliveryUnavailable("circuit breaker is open")
+        try:
+            result = await make_call()
+        except TelegramRetryAfter as exc:
+            # Flood control is an answer from a healthy API: it resets the
+            # breaker, but the call itself still has to wait.
+            breaker.success()
+            metrics.incr("sender.flood_wait")
+            if interactive and exc.retry_after > INTERACTIVE_MAX_RETRY_AFTER:
+                raise DeliveryUnavailable(f"flood control, retry in {exc.retry_after}s") from exc
+            if attempt == attempts - 1:
+                raise DeliveryUnavailable("flood control retries exhausted") from exc
+            await asyncio.sleep(exc.retry_after)
+        except (TelegramNetworkError, TelegramServerError) as exc:
+            breaker.failure()
+            metrics.incr("sender.network_error")
+            if attempt == attempts - 1:
+                raise DeliveryUnavailable(str(exc)) from exc
+            await asyncio.sleep(_backoff(attempt))
+        except TelegramAPIError:
+            # Bad request, blocked chat and friends: the API works, the chat
+            # doesn't. Let the caller decide.
+            breaker.success()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            breaker.success()
+            return result
+    raise DeliveryUnavailable("retries exhausted")
+
+
+async def send_message(
+    bot: Bot, chat_id: int, text: str, *, interactive: bool = False, **kwargs
+) -> Message:
+    return await _call(
+        lambda: bot.send_message(chat_id, text, **kwargs), interactive=interactive
+    )
+
+
+async def edit_message_text(
+    bot: Bot,
+    text: str,
+    *,
+    chat_id: int,
+    message_id: int,
+    interactive: bool = False,
+    **kwargs,
+) -> Message | bool:
+    return await _call(
+        lambda: bot.edit_message_text(
+            text=text, chat_id=chat_id, message_id=message_id, **kwargs
+        ),
+        interactive=interactive,
+    )
+
+
+async def send_document(
+    bot: Bot,
+    chat_id: int,
+    document: InputFile | str,
+    *,
+    interactive: bool = False,
+    **kwargs,
+) -> Message:
+    return await _call(
+        lambda: bot.send_document(chat_id, document, **kwargs), interactive=interactive
+    )
@@ -0,0 +1,97 @@
+"""Encoding of the state file.
+
+Three formats, chosen with ``STATE_FORMAT``:
+
+* ``json`` — pretty-printed JSON, easy to read and edit by hand (default);
+* ``json-compact`` — minified JSON, smaller and faster to write;
+* ``msgpack`` — binary MessagePack, smallest and fastest to parse.
+
+JSON goes through ``orjson`` when it is installed and falls back to the
+stdlib otherwise; ``msgpack`` requires the ``msgpack`` package. Loading
+detects the format from the first byte, so switching ``STATE_FORMAT`` needs
+no migration — the next write simply uses the new format. To convert right
+away::
+
+    python -m app.serialization msgpack
+"""
+
+import json
+import os
+import sys
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+FORMAT_JSON = "json"
+FORMAT_JSON_COMPACT = "json-compact"
+FORMAT_MSGPACK = "msgpack"
+FORMATS = (FORMAT_JSON, FORMAT_JSON_COMPACT, FORMAT_MSGPACK)
+
+
+def detect(raw: bytes) -> str:
+    """Guess the format of an encoded state.
+
+    The state is always a mapping: in MessagePack that starts with a fixmap
+    (0x80–0x8f) or map16/map32 (0xde/0xdf) byte, none of which can start a
+    JSON document.
+    """
+    if raw and (0x80 <= raw[0] <= 0x8F or raw[0] in (0xDE, 0xDF)):
+        return FORMAT_MSGPACK
+    return FORMAT_JSON
+
+
+def dumps(data: dict, fmt: str) -> bytes:
+    if fmt == FORMAT_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("STATE_FORMAT=msgpack requires the msgpack package")
+        return msgpack.packb(data, use_bin_type=True)
+    if fmt == FORMAT_JSON_COMPACT:
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    if fmt == FORMAT_JSON:
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        return json.dumps(data, ensure_ascii=False, indent=2).encode()
+    raise ValueError(f"unknown state format {fmt!r}, expected one of {FORMATS}")
+
+
+def loads(raw: bytes) -> dict:
+    """Decode a state in any supported format; raises ValueError if malformed."""
+    if detect(raw) == FORMAT_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("state file is MessagePack but msgpack is not installed")
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def main(argv: list[str]) -> int:
+    from app import storage
+
+    if len(argv) != 1 or argv[0] not in FORMATS:
+        print(f"usage: python -m app.serialization {{{','.join(FORMATS)}}}", file=sys.stderr)
+        return 2
+    fmt = argv[0]
+    with storage.locked():
+        raw = storage.DATA_PATH.read_bytes()
+        encoded = dumps(loads(raw), fmt)
+        tmp_path = storage.DATA_PATH.with_suffix(".tmp")
+        tmp_path.write_bytes(encoded)
+        os.replace(tmp_path, storage.DATA_PATH)
+    print(f"{storage.DATA_PATH}: {detect(raw)} {len(raw)} B -> {fmt} {len(encoded)} B")
+    if os.getenv("STATE_FORMAT", FORMAT_JSON) != fmt:
+        print(f"Set STATE_FORMAT={fmt}, otherwise the bot rewrites it on the next save.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
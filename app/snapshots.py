@@ -0,0 +1,150 @@
+"""Compressed, rotating snapshots of the state file.
+
+Snapshots live in ``app/data/snapshots/`` as
+``state-YYYYmmdd-HHMMSS-<hash>.<gz|zst>`` holding the state file as is
+(whatever ``STATE_FORMAT`` it is in); the hash is the first 12 hex digits
+of the sha256 of the raw state, so an unchanged state is detected from the
+newest file name alone and no snapshot is written. ``zstandard`` is used when
+installed, gzip otherwise; both are read back regardless of which one wrote
+them.
+
+Retention keeps the newest snapshot of each of the last 24 hours, 30 days and
+12 months and deletes everything else.
+"""
+
+import gzip
+import hashlib
+import logging
+import pathlib
+from datetime import datetime
+
+from app import migrations, serialization, storage
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+_DECOMPRESS_ERRORS: tuple[type[Exception], ...] = (OSError, EOFError, ValueError)
+if zstandard is not None:
+    _DECOMPRESS_ERRORS += (zstandard.ZstdError,)
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = storage.DATA_PATH.parent / "snapshots"
+
+KEEP_HOURLY = 24
+KEEP_DAILY = 30
+KEEP_MONTHLY = 12
+
+_STAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()[:12]
+
+
+def _compress(raw: bytes) -> tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(raw), "zst"
+    return gzip.compress(raw, compresslevel=9), "gz"
+
+
+def _decompress(path: pathlib.Path) -> bytes:
+    blob = path.read_bytes()
+    if path.name.endswith(".zst"):
+        if zstandard is None:
+            raise ValueError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+def snapshot_time(name: str) -> datetime:
+    stamp = name.removeprefix("state-")[: len("YYYYmmdd-HHMMSS")]
+    return datetime.strptime(stamp, _STAMP_FORMAT)
+
+
+def list_snapshots() -> list[pathlib.Path]:
+    """Snapshots, newest first."""
+    if not SNAPSHOT_DIR.exists():
+        return []
+    return sorted(
+        (path for path in SNAPSHOT_DIR.glob("state-*") if path.suffix in (".gz", ".zst")),
+        key=lambda path: path.name,
+        reverse=True,
+    )
+
+
+def take_snapshot(force: bool = False) -> pathlib.Path | None:
+    """Write a snapshot unless the state is unchanged since the newest one.
+
+    Returns the new file, or None when nothing was written.
+    """
+    if not storage.DATA_PATH.exists():
+        return None
+    raw = storage.DATA_PATH.read_bytes()
+    digest = _digest(raw)
+    existing = list_snapshots()
+    if not force and existing and existing[0].name.split(".", 1)[0].endswith(digest):
+        return None
+
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    blob, ext = _compress(raw)
+    path = SNAPSHOT_DIR / f"state-{datetime.now().strftime(_STAMP_FORMAT)}-{digest}.{ext}"
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(blob)
+    tmp_path.replace(path)
+    log.info("State snapshot written: %s (%d -> %d bytes)", path.name, len(raw), len(blob))
+    prune()
+    return path
+
+
+def prune() -> list[pathlib.Path]:
+    """Apply the hourly/daily/monthly retention; returns deleted files."""
+    keep: set[pathlib.Path] = set()
+    for bucket_format, limit in (
+        ("%Y%m%d%H", KEEP_HOURLY),
+        ("%Y%m%d", KEEP_DAILY),
+        ("%Y%m", KEEP_MONTHLY),
+    ):
+        seen: set[str] = set()
+        for path in list_snapshots():
+            bucket = snapshot_time(path.name).strftime(bucket_format)
+            if bucket in seen:
+                continue
+            if len(seen) == limit:
+                break
+            seen.add(bucket)
+            keep.add(path)
+
+    deleted = [path for path in list_snapshots() if path not in keep]
+    for path in deleted:
+        path.unlink(missing_ok=True)
+    return deleted
+
+
+def load_snapshot(name: str) -> dict:
+    """Read, validate and migrate a snapshot by file name.
+
+    Raises ValueError if unusable.
+    """
+    path = SNAPSHOT_DIR / name
+    if path.parent != SNAPSHOT_DIR or not path.is_file():
+        raise ValueError("snapshot not found")
+    try:
+        data = serialization.loads(_decompress(path))
+    except _DECOMPRESS_ERRORS as exc:
+        raise ValueError(f"snapshot is corrupted: {exc}") from exc
+    storage.validate_state(data)
+    migrations.upgrade(data)
+    return data
+
+
+async def restore_snapshot(name: str) -> None:
+    """Swap a snapshot in as the live state.
+
+    The current state is snapshotted first, so a restore can be undone.
+    """
+    data = load_snapshot(name)
+    take_snapshot(force=True)
+    await storage.replace_state(data)
@@ -0,0 +1,217 @@
+"""Payment statistics maintained incrementally on write.
+
+Storage calls the ``on_*`` hooks from inside its write commands, so
+``State.stats`` always matches users and payments without rescanning them:
+
+* per month — members on the books, how many paid, who paid late;
+* per member — the current and best run of on-time months, the number
+  of late payments, and the member's own timeline of paid months, so one
+  member's history is read without touching anybody else's payments;
+* rankings — members by late payments and by running streak, kept sorted
+  so /stats reads the top entries instead of scanning every member.
+
+A payment is late when it is recorded after the member's due day (personal
+``billing_day`` or ``BILLING_DAY``) of the month it is for. Streaks follow
+the newest paid month; marking an older month later counts towards the
+month's totals but leaves the streak alone.
+
+:func:`rebuild` derives the aggregates from scratch; the schema migration
+uses it for files written before statistics existed.
+"""
+
+import bisect
+import heapq
+import html
+from datetime import date, datetime
+from itertools import chain
+
+from app.config import BILLING_DAY
+from app.models import Member, MemberStats, MonthStats, State, Stats
+
+# How many months /stats shows, and how many members per ranking.
+HISTORY_MONTHS = 6
+TOP = 5
+
+
+def month_key(moment: date) -> str:
+    return moment.strftime("%Y-%m")
+
+
+def previous_month(month: str) -> str:
+    year, mon = map(int, month.split("-"))
+    return f"{year - 1}-12" if mon == 1 else f"{year}-{mon - 1:02d}"
+
+
+def is_late(member: Member, month: str, now: datetime) -> bool:
+    year, mon = map(int, month.split("-"))
+    due = date(year, mon, member.billing_day or BILLING_DAY)
+    return now.date() > due
+
+
+def _month(stats: Stats, month: str) -> MonthStats:
+    entry = stats.months.get(month)
+    if entry is None:
+        entry = stats.months[month] = MonthStats(members=stats.members)
+    return entry
+
+
+def _counts(member: Member) -> bool:
+    return member.role != "admin"
+
+
+def _rank(stats: Stats, uid: int, personal: MemberStats) -> None:
+    if personal.late:
+        bisect.insort(stats.late_ranking, (personal.late, uid))
+    if personal.streak > 1:
+        ranking = stats.streak_rankings.setdefault(personal.last_paid, [])
+        bisect.insort(ranking, (personal.streak, uid))
+
+
+def _unrank(stats: Stats, uid: int, personal: MemberStats) -> None:
+    if personal.late:
+        _discard(stats.late_ranking, (personal.late, uid))
+    if personal.streak > 1:
+        ranking = stats.streak_rankings[personal.last_paid]
+        _discard(ranking, (personal.streak, uid))
+        if not ranking:
+            del stats.streak_rankings[personal.last_paid]
+
+
+def _discard(ranking: list[tuple[int, int]], entry: tuple[int, int]) -> None:
+    index = bisect.bisect_left(ranking, entry)
+    if index < len(ranking) and ranking[index] == entry:
+        del ranking[index]
+
+
+def on_member_added(state: State, member: Member, now: datetime) -> None:
+    if not _counts(member):
+        return
+    stats = state.stats
+    stats.members += 1
+    stats.per_member[member.id] = MemberStats(since=month_key(now))
+    _month(stats, month_key(now)).members = stats.members
+
+
+def on_member_removed(state: State, member: Member, now: datetime) -> None:
+    """Call before the member's payments are dropped from ``state``."""
+    stats = state.stats
+    personal = stats.per_member.pop(member.id, None)
+    if personal is None:
+        return
+    _unrank(stats, member.id, personal)
+    stats.members -= 1
+    _month(stats, month_key(now)).members = stats.members
+    for month in personal.months:
+        entry = stats.months.get(month)
+        if entry is not None:
+            entry.paid -= 1
+            entry.late.discard(member.id)
+
+
+def on_paid(state: State, member: Member, month: str, now: datetime) -> None:
+    """Call once when ``member`` gets newly marked as paid for ``month``."""
+    personal = state.stats.per_member.get(member.id)
+    if personal is None:
+        return
+    late = is_late(member, month, now)
+    _unrank(state.stats, member.id, personal)
+    personal.months[month] = late
+    entry = _month(state.stats, month)
+    entry.paid += 1
+    if late:
+        entry.late.add(member.id)
+        personal.late += 1
+    _extend_streak(personal, month, late)
+    _rank(state.stats, member.id, personal)
+
+
+def _extend_streak(personal: MemberStats, month: str, late: bool) -> None:
+    if personal.last_paid is not None and month <= personal.last_paid:
+        return
+    if late:
+        personal.streak = 0
+    elif personal.last_paid == previous_month(month):
+        personal.streak += 1
+    else:
+        personal.streak = 1
+    personal.best_streak = max(personal.best_streak, personal.streak)
+    personal.last_paid = month
+
+
+def rebuild(state: State) -> Stats:
+    """Aggregates derived from users and payments alone.
+
+    Payment dates are not stored, so every payment counts as on time, and
+    past months get today's member count. Per-member timelines are left
+    empty: schema migration 2 runs this, and the timelines are seeded by
+    later migrations.
+    """
+    stats = Stats()
+    members = [member for member in state.users.values() if _counts(member)]
+    stats.members = len(members)
+    for member in members:
+        stats.per_member[member.id] = MemberStats()
+    for month in sorted(state.payments):
+        entry = stats.months[month] = MonthStats(members=stats.members)
+        for uid in state.payments[month]:
+            personal = stats.per_member.get(uid)
+            if personal is not None:
+                entry.paid += 1
+                _extend_streak(personal, month, late=False)
+    for uid, personal in stats.per_member.items():
+        _rank(stats, uid, personal)
+    return stats
+
+
+def recent_months(now: datetime, count: int) -> list[str]:
+    """``count`` month keys ending with the current one, newest first."""
+    months = [month_key(now)]
+    while len(months) < count:
+        months.append(previous_month(months[-1]))
+    return months
+
+
+def _trend(current: MonthStats, previous: MonthStats | None) -> str:
+    if previous is None or not previous.members or not current.members:
+        return ""
+    delta = round(100 * current.paid / current.members - 100 * previous.paid / previous.members)
+    if delta > 0:
+        return f" ▲{delta}%"
+    if delta < 0:
+        return f" ▼{-delta}%"
+    return " ="
+
+
+def render(stats: Stats, users: dict[int, Member], now: datetime) -> str:
+    current = month_key(now)
+    months = heapq.nlargest(HISTORY_MONTHS, stats.months.keys() | {current})
+    lines = ["📊 <b>Статистика оплат</b>", f"Участников сейчас: {stats.members}", ""]
+    for month in months:
+        entry = stats.months.get(month) or MonthStats(members=stats.members)
+        share = round(100 * entry.paid / entry.members) if entry.members else 0
+        late = f", с опозданием {len(entry.late)}" if entry.late else ""
+        trend = _trend(entry, stats.months.get(previous_month(month)))
+        lines.append(
+            f"<b>{month}</b>: {entry.paid}/{entry.members} ({share}%){trend}{late}"
+        )
+
+    def name(uid: int) -> str:
+        member = users.get(uid)
+        return html.escape(member.name) if member else str(uid)
+
+    late_payers = stats.late_ranking[: -TOP - 1 : -1]
+    if late_payers:
+        lines.append("")
+        lines.append("🐢 <b>Чаще всех опаздывают:</b>")
+        lines.extend(f"• {name(uid)} — опозданий: {late}" for late, uid in late_payers)
+
+    # A run is still going only if the last paid month is this or the previous one.
+    alive = {current, previous_month(current)}
+    streaks = heapq.nlargest(
+        TOP, chain.from_iterable(stats.streak_rankings.get(month, [])[-TOP:] for month in alive)
+    )
+    if streaks:
+        lines.append("")
+        lines.append("🔥 <b>Платят вовремя подряд:</b>")
+        lines.extend(f"• {name(uid)} — {streak} мес." for streak, uid in streaks)
+    return "\n".join(lines)
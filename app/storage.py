@@ -1,8 +1,21 @@
-import json
+import asyncio
+import functools
+import logging
+import os
 import pathlib
-from json import JSONDecodeError
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from datetime import datetime
+from typing import Any, TypeVar
 
-from app.config import DEFAULT_PRICE, DEFAULT_PAYMENT_INFO
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+from app import migrations, serialization, stats
+from app.config import DEFAULT_PRICE, DEFAULT_PAYMENT_INFO, STATE_FORMAT
+from app.models import Member, MemberStats, Settings, State, Stats
 
 # Resolve relative to the package directory so the path is the same whether
 # the bot is run as `python -m app.main` from the repo root or from inside the
@@ -14,16 +27,40 @@ DATA_PATH.parent.mkdir(exist_ok=True, parents=True)
 # one-time migration on startup if no file exists at DATA_PATH.
 _LEGACY_PATH = pathlib.Path("data") / "state.json"
 
+# Delivery outcomes reported by fan-out paths (reminders, broadcasts).
+DELIVERY_OK = "ok"
+DELIVERY_FAILED = "failed"
+DELIVERY_BLOCKED = "blocked"
+
+# Mutation events passed to subscribers as ``listener(event, chat_id)`` after
+# the change is persisted. In-memory structures that mirror the state (the
+# per-member billing queue, ...) use them to update incrementally instead of
+# rescanning everything.
+EVENT_USER_ADDED = "user_added"
+EVENT_USER_REMOVED = "user_removed"
+EVENT_USER_CHANGED = "user_changed"
+EVENT_PAID = "paid"
+# The whole state was swapped (restore from snapshot); chat_id is 0.
+EVENT_STATE_REPLACED = "state_replaced"
+
+_listeners: list[Callable[[str, int], None]] = []
+
+T = TypeVar("T")
+
+log = logging.getLogger(__name__)
+
+
+def subscribe(listener: Callable[[str, int], None]) -> None:
+    _listeners.append(listener)
+
+
+def _notify(event: str, chat_id: int) -> None:
+    for listener in _listeners:
+        listener(event, chat_id)
 
-def _empty_state() -> dict:
-    return {
-        "users": {},
-        "payments": {},
-        "settings": {
-            "price": DEFAULT_PRICE,
-            "payment_info": DEFAULT_PAYMENT_INFO,
-        },
-    }
+
+def _default_settings() -> Settings:
+    return Settings(price=DEFAULT_PRICE, payment_info=DEFAULT_PAYMENT_INFO)
 
 
 def _maybe_migrate_legacy() -> None:
@@ -32,123 +69,522 @@ def _maybe_migrate_legacy() -> None:
     if not _LEGACY_PATH.exists():
         return
     try:
-        DATA_PATH.write_text(_LEGACY_PATH.read_text(), encoding="utf-8")
+        DATA_PATH.write_bytes(_LEGACY_PATH.read_bytes())
     except OSError:
         pass
 
 
-def _load() -> dict:
-    _maybe_migrate_legacy()
-    if not DATA_PATH.exists():
-        return _empty_state()
-    try:
-        with DATA_PATH.open() as f:
-            data = json.load(f)
-    except JSONDecodeError:
-        return _empty_state()
+class _FileLock:
+    """Advisory ``flock`` on ``state.json.lock`` shared by every process.
 
-    changed = False
-    if "users" not in data:
-        data["users"] = {}
-        changed = True
-    if "payments" not in data:
-        data["payments"] = {}
-        changed = True
-    if "settings" not in data:
-        data["settings"] = {
-            "price": DEFAULT_PRICE,
-            "payment_info": DEFAULT_PAYMENT_INFO,
-        }
-        changed = True
-    else:
-        if "price" not in data["settings"]:
-            data["settings"]["price"] = DEFAULT_PRICE
-            changed = True
-        if "payment_info" not in data["settings"]:
-            data["settings"]["payment_info"] = DEFAULT_PAYMENT_INFO
-            changed = True
+    Writers hold it exclusively from reading the latest state to replacing
+    the file, so processes sharing the data volume never lose each other's
+    updates. The lock file also stores a change counter that every write
+    bumps: a process compares it with the value its cache was built from and
+    re-reads the state only when someone else has written.
 
-    if changed:
-        _save(data)
-    return data
+    Nested ``hold()`` calls within the process reuse the outer lock. Without
+    ``fcntl`` (Windows) there is no locking and only one process may use the
+    data directory.
+    """
 
+    def __init__(self) -> None:
+        self._fd: int | None = None
+        self._path: pathlib.Path | None = None
+        self._depth = 0
+
+    def _open(self) -> int:
+        path = DATA_PATH.with_name(DATA_PATH.name + ".lock")
+        if self._path != path:
+            if self._fd is not None:
+                os.close(self._fd)
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._path = path
+        return self._fd
+
+    @contextmanager
+    def hold(self, exclusive: bool = True) -> Iterator[None]:
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        fd = self._open()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self._depth = 1
+        try:
+            yield
+        finally:
+            self._depth = 0
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def revision(self) -> int:
+        fd = self._open()
+        os.lseek(fd, 0, os.SEEK_SET)
+        raw = os.read(fd, 8)
+        return int.from_bytes(raw, "big") if len(raw) == 8 else 0
+
+    def bump(self) -> None:
+        revision = self.revision() + 1
+        fd = self._open()
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, revision.to_bytes(8, "big"))
+
+
+_lock = _FileLock()
+
+
+def locked() -> AbstractContextManager[None]:
+    """Hold the cross-process write lock, e.g. while rewriting the file by hand."""
+    return _lock.hold()
+
+
+def init() -> None:
+    """Bring the state file up to the current schema. Call once at startup.
+
+    This is the only place that fixes up old files; ``_load`` assumes the
+    current schema and never writes.
+    """
+    with _lock.hold():
+        _maybe_migrate_legacy()
+        if not DATA_PATH.exists():
+            return
+        try:
+            raw = serialization.loads(DATA_PATH.read_bytes())
+        except ValueError:
+            return
+        if migrations.upgrade(raw):
+            _write(raw)
+
+
+# Parsed state and the stamp of the file it was read from: the change
+# counter plus (mtime, size), so edits made without the lock (by hand, by
+# the serialization CLI) are noticed too. Reads are served from here until
+# the stamp changes.
+_cache: State | None = None
+_cache_stamp: tuple[int, int, int] | None = None
+# Set when the cache was refreshed because another process wrote; cleared by
+# the watcher once listeners have been told.
+_changed_elsewhere = False
+
+
+def _stamp() -> tuple[int, int, int]:
+    stat = DATA_PATH.stat()
+    return _lock.revision(), stat.st_mtime_ns, stat.st_size
+
+
+def _load() -> State:
+    global _cache, _cache_stamp, _changed_elsewhere
+    with _lock.hold(exclusive=False):
+        if not DATA_PATH.exists():
+            return State(settings=_default_settings())
+        stamp = _stamp()
+        if _cache is not None and stamp == _cache_stamp:
+            return _cache
+        try:
+            raw = serialization.loads(DATA_PATH.read_bytes())
+        except ValueError:
+            return State(settings=_default_settings())
+    _changed_elsewhere = _changed_elsewhere or _cache is not None
+    _cache = State.from_dict(raw, _default_settings())
+    _cache_stamp = stamp
+    return _cache
+
+
+def _write(raw: dict) -> None:
+    # Write next to the target and rename over it, so a crash mid-write never
+    # leaves a truncated state.json behind. Callers hold the lock.
+    tmp_path = DATA_PATH.with_suffix(".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(serialization.dumps(raw, STATE_FORMAT))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, DATA_PATH)
+    _lock.bump()
+
+
+def _save(state: State) -> None:
+    global _cache, _cache_stamp
+    _write(state.to_dict())
+    _cache = state
+    _cache_stamp = _stamp()
+
+
+async def _watch(interval: float) -> None:
+    global _changed_elsewhere
+    while True:
+        await asyncio.sleep(interval)
+        _load()
+        if _changed_elsewhere:
+            _changed_elsewhere = False
+            _notify(EVENT_STATE_REPLACED, 0)
+
+
+_watch_task: asyncio.Task | None = None
+
+
+def start_watcher(interval: float) -> None:
+    """Poll for writes by other processes and tell listeners about them.
+
+    Reads always see the latest state anyway; this only keeps in-memory
+    mirrors (the billing queue, ...) in sync when nobody happens to read.
+    A change made elsewhere is reported as ``EVENT_STATE_REPLACED``.
+    """
+    global _watch_task
+    _watch_task = asyncio.create_task(_watch(interval))
+
+
+def validate_state(data: object) -> None:
+    """Raise ValueError unless ``data`` looks like a state file."""
+    if not isinstance(data, dict):
+        raise ValueError("state must be an object")
+    for key in ("users", "payments"):
+        if not isinstance(data.get(key), dict):
+            raise ValueError(f"state has no {key!r} section")
+    for uid, info in data["users"].items():
+        if not uid.isdigit() or not isinstance(info, dict) or "name" not in info:
+            raise ValueError(f"malformed user {uid!r}")
+    for month, paid in data["payments"].items():
+        if not isinstance(paid, dict):
+            raise ValueError(f"malformed payments for {month!r}")
+
+
+class _Batch:
+    """Mutations applied together by the writer, persisted with one write."""
+
+    def __init__(self, state: State) -> None:
+        self.state = state
+        self.dirty = False
+        self.events: list[tuple[str, int]] = []
+
+    def changed(self, event: str | None = None, chat_id: int = 0) -> None:
+        self.dirty = True
+        if event is not None:
+            self.events.append((event, chat_id))
+
+
+class _Writer:
+    """The single writer of the state.
+
+    Mutations are queued as commands and applied in order by one task.
+    Everything queued by the time the task wakes up — i.e. within one loop
+    tick — is applied to the same in-memory state and persisted with a single
+    write, then every caller's future is resolved and listeners are notified.
+    """
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, command: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((command, args, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Let handlers that are already runnable queue their commands too.
+            await asyncio.sleep(0)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                self._apply(batch)
+            except Exception as exc:
+                log.exception("State write failed")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _apply(self, batch: list[tuple[Callable, tuple, asyncio.Future]]) -> None:
+        global _cache
+        with _lock.hold():
+            tx = _Batch(_load())
+            outcomes: list[tuple[asyncio.Future, Any, Exception | None]] = []
+            for command, args, future in batch:
+                try:
+                    outcomes.append((future, command(tx, *args), None))
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+            if tx.dirty:
+                try:
+                    _save(tx.state)
+                except Exception:
+                    # The cached state was mutated in place; drop it so the
+                    # next read reflects what is actually on disk.
+                    _cache = None
+                    raise
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        for event, chat_id in tx.events:
+            _notify(event, chat_id)
+
+
+_writer = _Writer()
+
+
+def _mutation(command: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Expose ``command(tx, *args)`` as ``await mutation(*args)`` via the writer."""
+
+    @functools.wraps(command)
+    async def submit(*args: Any) -> T:
+        return await _writer.submit(command, *args)
+
+    return submit
+
+
+@_mutation
+def replace_state(tx: _Batch, raw: dict) -> None:
+    """Atomically swap the whole state, e.g. when restoring a snapshot.
+
+    Snapshots taken before a schema change are migrated on the way in.
+    """
+    validate_state(raw)
+    migrations.upgrade(raw)
+    tx.state = State.from_dict(raw, _default_settings())
+    tx.changed(EVENT_STATE_REPLACED)
 
-def _save(data: dict) -> None:
-    with DATA_PATH.open("w") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
 
+@_mutation
+def add_user(
+    tx: _Batch, chat_id: int, name: str, username: str | None, role: str = "member"
+) -> None:
+    if chat_id not in tx.state.users:
+        member = tx.state.users[chat_id] = Member(chat_id, name, username, role)
+        stats.on_member_added(tx.state, member, datetime.now())
+        tx.changed(EVENT_USER_ADDED, chat_id)
 
-def add_user(chat_id: int, name: str, username: str | None, role: str = "member") -> None:
-    data = _load()
-    uid = str(chat_id)
-    if uid not in data["users"]:
-        data["users"][uid] = {"name": name, "username": username, "role": role}
-        _save(data)
 
+@_mutation
+def add_users_many(
+    tx: _Batch, users: list[tuple[int, str, str | None]], role: str = "member"
+) -> int:
+    """Add ``(chat_id, name, username)`` entries with a single write.
 
-def update_user_contact(chat_id: int, name: str | None, username: str | None) -> bool:
+    Users that already exist are left untouched. Returns how many were added.
+    """
+    added = 0
+    now = datetime.now()
+    for chat_id, name, username in users:
+        if chat_id in tx.state.users:
+            continue
+        member = tx.state.users[chat_id] = Member(chat_id, name, username, role)
+        stats.on_member_added(tx.state, member, now)
+        tx.changed(EVENT_USER_ADDED, chat_id)
+        added += 1
+    return added
+
+
+@_mutation
+def update_user_contact(tx: _Batch, chat_id: int, name: str | None, username: str | None) -> bool:
     """Update name/username of an existing user if values changed.
 
     Returns True when something was written. No-op if the user is unknown
     or both fields already match.
     """
-    data = _load()
-    uid = str(chat_id)
-    user = data["users"].get(uid)
-    if user is None:
+    member = tx.state.users.get(chat_id)
+    if member is None:
         return False
 
     changed = False
-    if name and user.get("name") != name:
-        user["name"] = name
+    if name and member.name != name:
+        member.name = name
         changed = True
-    if username and user.get("username") != username:
-        user["username"] = username
+    if username and member.username != username:
+        member.username = username
         changed = True
 
     if changed:
-        _save(data)
+        tx.changed(EVENT_USER_CHANGED, chat_id)
     return changed
 
 
-def remove_user(chat_id: int) -> None:
-    data = _load()
-    uid = str(chat_id)
-    data["users"].pop(uid, None)
-    for month in data["payments"]:
-        data["payments"][month].pop(uid, None)
-    _save(data)
+@_mutation
+def set_billing_day(tx: _Batch, chat_id: int, day: int | None) -> bool:
+    """Give a user a personal billing day (1..28), or reset to the global one.
+
+    Returns False if the user is unknown.
+    """
+    member = tx.state.users.get(chat_id)
+    if member is None:
+        return False
+    member.billing_day = day
+    tx.changed(EVENT_USER_CHANGED, chat_id)
+    return True
+
+
+@_mutation
+def remove_user(tx: _Batch, chat_id: int) -> None:
+    member = tx.state.users.pop(chat_id, None)
+    if member is not None:
+        stats.on_member_removed(tx.state, member, datetime.now())
+    for paid in tx.state.payments.values():
+        paid.discard(chat_id)
+    tx.changed(EVENT_USER_REMOVED, chat_id)
+
+
+def get_user(chat_id: int) -> Member | None:
+    return _load().users.get(chat_id)
+
+
+def list_users() -> dict[int, Member]:
+    return _load().users
+
 
+def list_members(admin_id: int) -> dict[int, Member]:
+    return {uid: member for uid, member in list_users().items() if uid != admin_id}
 
-def list_users() -> dict:
-    return _load()["users"]
 
+@_mutation
+def set_paid(tx: _Batch, chat_id: int, month: str) -> None:
+    _mark_paid(tx, chat_id, month, datetime.now())
 
-def list_members(admin_id: int) -> dict:
-    return {uid: info for uid, info in list_users().items() if int(uid) != admin_id}
 
+@_mutation
+def set_paid_many(tx: _Batch, chat_ids: list[int], month: str) -> None:
+    """Mark several users as paid for ``month`` with a single write."""
+    now = datetime.now()
+    for chat_id in chat_ids:
+        _mark_paid(tx, chat_id, month, now)
 
-def set_paid(chat_id: int, month: str) -> None:
-    data = _load()
-    data["payments"].setdefault(month, {})[str(chat_id)] = True
-    _save(data)
+
+def _mark_paid(tx: _Batch, chat_id: int, month: str, now: datetime) -> None:
+    paid = tx.state.payments.setdefault(month, set())
+    member = tx.state.users.get(chat_id)
+    if chat_id not in paid and member is not None:
+        stats.on_paid(tx.state, member, month, now)
+    paid.add(chat_id)
+    tx.changed(EVENT_PAID, chat_id)
+
+
+def is_paid(chat_id: int, month: str) -> bool:
+    return chat_id in _load().payments.get(month, ())
+
+
+def get_stats() -> Stats:
+    return _load().stats
+
+
+def get_member_stats(chat_id: int) -> MemberStats | None:
+    """A member's aggregates, including their own payment timeline."""
+    return _load().stats.per_member.get(chat_id)
+
+
+def list_payments() -> dict[str, set[int]]:
+    """All payments as ``{month: {uid, ...}}``."""
+    return _load().payments
 
 
 def unpaid(month: str, admin_id: int) -> list[int]:
-    data = _load()
-    users = list_members(admin_id)
-    paid = data["payments"].get(month, {})
-    return [int(uid) for uid in users if uid not in paid]
+    state = _load()
+    paid = state.payments.get(month, set())
+    return [uid for uid in state.users if uid != admin_id and uid not in paid]
+
+
+@_mutation
+def record_delivery(tx: _Batch, outcomes: dict[int, str]) -> None:
+    """Persist delivery results of a batch of sends in a single write.
+
+    ``outcomes`` maps chat id to one of ``DELIVERY_OK``, ``DELIVERY_FAILED``
+    or ``DELIVERY_BLOCKED``. Unknown chat ids are ignored.
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    for chat_id, outcome in outcomes.items():
+        member = tx.state.users.get(chat_id)
+        if member is None:
+            continue
+        if outcome == DELIVERY_OK:
+            member.last_ok = now
+            member.failures = 0
+            member.blocked = False
+        else:
+            member.failures += 1
+            member.blocked = outcome == DELIVERY_BLOCKED
+        tx.changed()
+
+
+@_mutation
+def reset_delivery(tx: _Batch, chat_id: int) -> bool:
+    """Forget failed deliveries of a user who reached the bot again.
+
+    Returns True when something was written.
+    """
+    member = tx.state.users.get(chat_id)
+    if member is None or (not member.blocked and not member.failures):
+        return False
+    member.failures = 0
+    member.blocked = False
+    tx.changed()
+    return True
+
+
+def get_reminded(month: str) -> set[int]:
+    return _load().reminded.get(month, set())
+
+
+@_mutation
+def mark_reminded(tx: _Batch, month: str, chat_ids: list[int]) -> None:
+    """Remember who got a scheduled reminder for ``month``.
+
+    Only the latest month is kept; earlier ones are never replayed.
+    """
+    if not chat_ids:
+        return
+    for old in [key for key in tx.state.reminded if key != month]:
+        del tx.state.reminded[old]
+    tx.state.reminded.setdefault(month, set()).update(chat_ids)
+    tx.changed()
+
+
+def get_job_last_run(job_id: str) -> datetime | None:
+    value = _load().jobs.get(job_id)
+    return datetime.fromisoformat(value) if value else None
+
+
+@_mutation
+def set_job_last_run(tx: _Batch, job_id: str, when: datetime) -> None:
+    tx.state.jobs[job_id] = when.isoformat(timespec="seconds")
+    tx.changed()
+
+
+def get_file_id(key: str) -> str | None:
+    return _load().files.get(key)
+
+
+@_mutation
+def remember_file(tx: _Batch, key: str, file_id: str) -> None:
+    if tx.state.files.get(key) != file_id:
+        tx.state.files[key] = file_id
+        tx.changed()
+
+
+@_mutation
+def forget_file(tx: _Batch, key: str) -> None:
+    if tx.state.files.pop(key, None) is not None:
+        tx.changed()
 
 
 def get_setting(key: str, default: str = "") -> str:
-    return _load()["settings"].get(key, default)
+    return getattr(_load().settings, key, default)
 
 
-def set_setting(key: str, value: str) -> None:
-    data = _load()
-    data["settings"][key] = value
-    _save(data)
+@_mutation
+def set_setting(tx: _Batch, key: str, value: str) -> None:
+    setattr(tx.state.settings, key, value)
+    tx.changed()
 
 
 def get_price() -> str:
@@ -0,0 +1,63 @@
+"""Minimal local stand-in for the Bot API, good enough for load benchmarks.
+
+Answers every ``/bot<token>/<method>`` request with a successful, plausible
+``Message`` after a configurable latency, and counts the TCP connections it
+served so benchmarks can show connection reuse.
+"""
+
+import asyncio
+import time
+
+from aiohttp import web
+
+
+class FakeBotAPI:
+    def __init__(self, latency: float = 0.02, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._peers: set[tuple] = set()
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def connections(self) -> int:
+        return len(self._peers)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        # Every TCP connection has its own client port, so distinct peers ==
+        # connections the client had to open.
+        self._peers.add(request.transport.get_extra_info("peername"))
+        form = await request.post()
+        await asyncio.sleep(self.latency)
+        chat_id = int(form.get("chat_id", 1))
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": self.requests,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": form.get("text", ""),
+                },
+            }
+        )
+
+    async def __aenter__(self) -> "FakeBotAPI":
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,66 @@
+"""Fan-out throughput vs. HTTP pool size, against the local fake Bot API.
+
+    python -m bench.fanout [--messages 2000] [--concurrency 100] [--latency 0.02]
+
+For every pool size the same number of messages is pushed through
+``app.sender.send_message`` with a fixed number of concurrent senders, using a
+session from ``app.main.build_session``. The report shows messages per second
+and how many TCP connections the fake server had to accept — with keep-alive
+that number should stay at (or below) the pool size.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("ADMIN_ID", "1")
+os.environ.setdefault("BOT_TOKEN", "42:bench")
+
+from aiogram import Bot  # noqa: E402
+
+from app import sender  # noqa: E402
+from app.main import build_session  # noqa: E402
+from bench.fake_api import FakeBotAPI  # noqa: E402
+
+POOL_SIZES = (1, 4, 16, 64, 100)
+
+
+async def _run(pool: int, messages: int, concurrency: int, latency: float) -> tuple[float, int]:
+    async with FakeBotAPI(latency=latency) as api:
+        bot = Bot(os.environ["BOT_TOKEN"], session=build_session(api_url=api.url, limit=pool))
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for chat_id in range(messages):
+            queue.put_nowait(chat_id)
+
+        async def worker() -> None:
+            while not queue.empty():
+                chat_id = queue.get_nowait()
+                await sender.send_message(bot, chat_id, "benchmark")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        await bot.session.close()
+        return messages / elapsed, api.connections
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    print(
+        f"{args.messages} messages, {args.concurrency} concurrent senders, "
+        f"{args.latency * 1000:.0f} ms simulated API latency"
+    )
+    print(f"{'pool':>6} {'msg/s':>10} {'connections':>12}")
+    for pool in POOL_SIZES:
+        rate, connections = await _run(pool, args.messages, args.concurrency, args.latency)
+        print(f"{pool:>6} {rate:>10.0f} {connections:>12}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
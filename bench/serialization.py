@@ -0,0 +1,96 @@
+"""State encode/decode speed and file size per format at a realistic scale.
+
+    python -m bench.serialization [--members 10000] [--months 24] [--repeat 5]
+
+Builds a synthetic state shaped like ``state.json`` and times
+``app.serialization.dumps``/``loads`` for every format, once with the stdlib
+``json`` module forced and once with ``orjson`` (when installed). Formats
+whose optional dependency is missing are reported as skipped.
+"""
+
+import argparse
+import os
+import random
+import time
+from contextlib import contextmanager
+
+os.environ.setdefault("ADMIN_ID", "1")
+
+from app import serialization  # noqa: E402
+
+
+def build_state(members: int, months: int) -> dict:
+    rnd = random.Random(42)
+    uids = [str(rnd.randrange(10**8, 10**10)) for _ in range(members)]
+    users = {
+        uid: {
+            "name": f"Участник {i} Фамилия",
+            "username": f"user_{i}" if i % 3 else None,
+            "role": "member",
+            "delivery": {"last_ok": "2026-10-15T12:03:11", "failures": 0, "blocked": False},
+        }
+        for i, uid in enumerate(uids)
+    }
+    payments = {
+        f"{2025 + m // 12}-{m % 12 + 1:02d}": {uid: True for uid in uids if rnd.random() < 0.9}
+        for m in range(months)
+    }
+    return {
+        "users": users,
+        "payments": payments,
+        "settings": {"price": "550", "payment_info": "+7XXX по СБП"},
+    }
+
+
+@contextmanager
+def _orjson(enabled: bool):
+    saved = serialization.orjson
+    serialization.orjson = saved if enabled else None
+    try:
+        yield
+    finally:
+        serialization.orjson = saved
+
+
+def _best(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=10_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    state = build_state(args.members, args.months)
+    print(f"{args.members} members, {args.months} months of payments, best of {args.repeat}")
+    print(f"{'format':<14} {'encoder':<8} {'dump ms':>9} {'load ms':>9} {'size KiB':>10}")
+
+    variants = [(fmt, "stdlib", False) for fmt in serialization.FORMATS[:2]]
+    if serialization.orjson is not None:
+        variants += [(fmt, "orjson", True) for fmt in serialization.FORMATS[:2]]
+    variants.append((serialization.FORMAT_MSGPACK, "msgpack", True))
+
+    for fmt, encoder, use_orjson in variants:
+        with _orjson(use_orjson):
+            try:
+                raw = serialization.dumps(state, fmt)
+            except RuntimeError as exc:
+                print(f"{fmt:<14} {encoder:<8} skipped: {exc}")
+                continue
+            dump = _best(lambda: serialization.dumps(state, fmt), args.repeat)
+            load = _best(lambda: serialization.loads(raw), args.repeat)
+        print(
+            f"{fmt:<14} {encoder:<8} {dump * 1000:>9.1f} {load * 1000:>9.1f} "
+            f"{len(raw) / 1024:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
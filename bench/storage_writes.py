@@ -0,0 +1,58 @@
+"""Throughput of a burst of concurrent storage mutations.
+
+    python -m bench.storage_writes [--members 2000] [--burst 200]
+
+Runs against a temporary copy of a synthetic state, never the bot's own
+``state.json``. ``--burst`` coroutines each mark one member as paid at the
+same moment — like everybody pressing "Оплачено ✅" after a reminder — and
+the run reports wall time and how many times the file was written.
+"""
+
+import argparse
+import asyncio
+import os
+import pathlib
+import tempfile
+import time
+
+os.environ.setdefault("ADMIN_ID", "1")
+
+from app import serialization, storage  # noqa: E402
+from bench.serialization import build_state  # noqa: E402
+
+
+async def _burst(uids: list[int], month: str) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(storage.set_paid(uid, month) for uid in uids))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=2_000)
+    parser.add_argument("--burst", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.DATA_PATH = pathlib.Path(tmp) / "state.json"
+        state = build_state(args.members, months=12)
+        storage.DATA_PATH.write_bytes(serialization.dumps(state, storage.STATE_FORMAT))
+
+        writes = 0
+        write = storage._write
+
+        def counting_write(raw: dict) -> None:
+            nonlocal writes
+            writes += 1
+            write(raw)
+
+        storage._write = counting_write
+        uids = [int(uid) for uid in list(state["users"])[: args.burst]]
+        elapsed = asyncio.run(_burst(uids, "2030-01"))
+
+    print(f"{args.members} members, {len(uids)} concurrent set_paid calls")
+    print(f"{elapsed * 1000:.1f} ms, {writes} file write(s)")
+
+
+if __name__ == "__main__":
+    main()